@@ -1,10 +1,21 @@
+import os
 import dash
+import flask
 import dash_bootstrap_components as dbc
-from dash import Input, Output, dcc, html
-import modules.LiveTracking as LiveTracking
-import modules.NextPassage as NextPassage
-import modules.FlightTrajectory as FlightTrajectory
-import modules.ScientificAnalysis as ScientificAnalysis
+from dash import ClientsideFunction, Input, Output, State, Patch, ctx, dcc, html, no_update
+import modules.BackgroundTasks as BackgroundTasks
+import modules.FlightArtifact as FlightArtifact
+from modules.LazyImport import LazyModule
+
+# The page modules pull in plotly, numpy, skyfield, sgp4, requests and pandas,
+# they are imported by the first callback that uses them
+LiveTracking = LazyModule("modules.LiveTracking")
+Catalog = LazyModule("modules.Catalog")
+NextPassage = LazyModule("modules.NextPassage")
+PassPrediction = LazyModule("modules.PassPrediction")
+LiveBroadcast = LazyModule("modules.LiveBroadcast")
+ScientificAnalysis = LazyModule("modules.ScientificAnalysis")
+Telemetry = LazyModule("modules.Telemetry")
 
 app = dash.Dash(
     external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.BOOTSTRAP],
@@ -15,6 +26,20 @@ app = dash.Dash(
 
 server = app.server
 
+# "client" interpolates the live position in the browser from a short ephemeris
+# window, "server" recomputes it on every interval tick, "push" subscribes the
+# browser to the positions broadcast on /api/live/stream. Past
+# PARISAT_PUSH_SUBSCRIBERS streams in a worker, push browsers poll
+# /api/live/position instead
+LIVE_MODE = os.environ.get("PARISAT_LIVE_MODE", "client")
+
+MAX_BATCH_OBSERVERS = int(os.environ.get("PARISAT_MAX_BATCH_OBSERVERS", 1000))
+MAX_BATCH_DAYS = 7
+# Points kept per trace in the browser while live telemetry extends the plot
+MAX_TELEMETRY_POINTS = 10000
+MIN_TRACK_STEP = 0.1
+MAX_TRACK_STEP = 60.0
+
 SIDEBAR_STYLE = {
     "position": "fixed",
     "top": 0,
@@ -78,13 +103,14 @@ sidebar = html.Div(
 )
 
 content = html.Div(id="page-content", style=CONTENT_STYLE)
-fig, visibility_traces, _ = FlightTrajectory.ShowOrbit()
 
 app.layout = html.Div([
     dcc.Location(id="url"),
     sidebar,
     content,
-    dcc.Interval(id="interval-component", interval=2*1000, n_intervals=0)
+    dcc.Interval(id="interval-component",
+                 interval=(1 if LIVE_MODE == "client" else 2)*1000, n_intervals=0,
+                 disabled=LIVE_MODE == "push")
 ], style={"background-color": "#ECEFF1", "min-height": "100vh"})
 
 
@@ -99,16 +125,30 @@ def render_page_content(pathname):
     elevation = 0.0
 
     if pathname == "/":
+        snapshot = LiveTracking.SharedSnapshot()
+        if LIVE_MODE == "client":
+            live_tracking_stores = [
+                dcc.Store(id="live-tracking-ephemeris",
+                          data=LiveTracking.SharedEphemerisWindow()),
+                dcc.Interval(id="ephemeris-interval",
+                             interval=LiveTracking.WINDOW_REFRESH_SECONDS*1000, n_intervals=0)
+            ]
+        elif LIVE_MODE == "server":
+            live_tracking_stores = [
+                dcc.Store(id="live-tracking-track", data=snapshot["track_key"])
+            ]
+        else:
+            live_tracking_stores = []
         return (
-            dcc.Graph(id='live-tracking-graph', figure=LiveTracking.ShowOrbit(latitude, longitude),
+            dcc.Graph(id='live-tracking-graph', figure=LiveTracking.ShowOrbit(latitude, longitude, snapshot),
                       style={"height": "90vh", "width": "100%"}, config={'displayModeBar': False}),
-            html.Div([
+            html.Div(live_tracking_stores + [
                 html.Hr(),
                 html.Div([
                     dbc.Row([
                         dbc.Col(html.P("Latitude:", style={
                                 "color": "#2C3E50", "font-family": "Roboto", "margin-bottom": "0", "min-width": "5rem"}), width="auto"),
-                        dbc.Col(dbc.Input(id="latitude-input", type="number", value=latitude, placeholder="Value", min=-90, max=90, style={
+                        dbc.Col(dbc.Input(id="latitude-input", type="number", debounce=500, value=latitude, placeholder="Value", min=-90, max=90, style={
                                 "color": "#2C3E50", "font-family": "Roboto", "width": "100%", "background-color": "transparent", "border": "none", "text-align": "right", "appearance": "textfield"}))
                     ], align="center"),
                 ]),
@@ -116,7 +156,7 @@ def render_page_content(pathname):
                     dbc.Row([
                         dbc.Col(html.P("Longitude:", style={
                                 "color": "#2C3E50", "font-family": "Roboto", "margin-bottom": "0", "min-width": "5rem"}), width="auto"),
-                        dbc.Col(dbc.Input(id="longitude-input", type="number", value=longitude, placeholder="Value", min=-180, max=180, style={
+                        dbc.Col(dbc.Input(id="longitude-input", type="number", debounce=500, value=longitude, placeholder="Value", min=-180, max=180, style={
                                 "color": "#2C3E50", "font-family": "Roboto", "width": "100%", "background-color": "transparent", "border": "none", "text-align": "right", "appearance": "textfield"}))
                     ], align="center"),
                 ]),
@@ -124,11 +164,22 @@ def render_page_content(pathname):
                     dbc.Row([
                         dbc.Col(html.P("Elevation:", style={
                                 "color": "#2C3E50", "font-family": "Roboto", "margin-bottom": "0", "min-width": "5rem"}), width="auto"),
-                        dbc.Col(dbc.Input(id="elevation-input", type="number", value=elevation, placeholder="Value", min=0, max=90, style={
+                        dbc.Col(dbc.Input(id="elevation-input", type="number", debounce=500, value=elevation, placeholder="Value", min=0, max=90, style={
                                 "color": "#2C3E50", "font-family": "Roboto", "width": "100%", "background-color": "transparent", "border": "none", "text-align": "right", "appearance": "textfield"}))
                     ], align="center"),
                 ]),
                 html.Hr(),
+                html.P("Also track:", style={
+                       "color": "#2C3E50", "font-family": "Roboto", "margin-bottom": "0.5rem"}),
+                dbc.Checklist(
+                    id="satellite-select",
+                    options=[{"label": name, "value": norad_id}
+                             for norad_id, name in Catalog.SATELLITES.items()
+                             if norad_id != Catalog.PRIMARY_NORAD_ID],
+                    value=[],
+                    style={"color": "#2C3E50", "font-family": "Roboto"}
+                ),
+                html.Hr(),
                 dbc.Button(
                     [
                         "Next Pass ",
@@ -146,20 +197,37 @@ def render_page_content(pathname):
                              children="Informations sur le prochain passage"),
                     id="collapse",
                     is_open=False
-                )
+                ),
+                dcc.Store(id="next-pass-query"),
+                dcc.Interval(id="next-pass-poll", interval=250,
+                             n_intervals=0, disabled=True)
             ])
         )
     elif pathname == "/flight-trajectory":
+        artifact = FlightArtifact.Load()
         return (
             html.Div([
                 dcc.Graph(
                     id='flight-trajectory-graph',
-                    figure=fig,
+                    figure=artifact["figure"],
                     style={"height": "100%", "width": "100%"},
                     config={'displayModeBar': False},
                     clear_on_unhover=True
                 ),
-                html.Div(id='photo-image-container')
+                dcc.Store(id='flight-trajectory-photos', data={
+                    "visibility_traces": artifact["visibility_traces"],
+                    "image_time": [4166, 4297, 4565, 4925, 4963, 5006, 5758, 6118, 6522, 6560]
+                }),
+                html.Div(
+                    html.Div([
+                        html.P(id='photo-caption', style={
+                               'color': '#2C3E50', 'font-family': 'Roboto', 'margin': '0'}),
+                        html.Img(id='photo-image', style={
+                                 'width': '20rem', 'height': 'auto', 'margin-top': '0.5rem'})
+                    ], style={'background-color': 'rgba(207, 216, 220, 0.5)', 'padding': '0.5rem', 'border-radius': '0.5rem'}),
+                    id='photo-image-container',
+                    style={'display': 'none'}
+                )
             ], style={"height": "90vh", "width": "100%"}), html.Div([
                 html.Hr(),
                 dbc.Row([
@@ -183,6 +251,9 @@ def render_page_content(pathname):
             ])
         )
     elif pathname == "/scientific-analysis":
+        telemetry = Telemetry.View()
+        # The cursor is taken first, rows arriving meanwhile are sent twice rather than lost
+        telemetry_cursor = telemetry.Cursor() if telemetry is not None else None
         return (
             dcc.Graph(
                 id='scientific-analysis-graph',
@@ -190,6 +261,9 @@ def render_page_content(pathname):
                 style={"height": "90vh", "width": "100%"},
                 config={'displaylogo': False, 'scrollZoom': True},
             ), html.Div([
+                dcc.Store(id="telemetry-cursor", data=telemetry_cursor),
+                dcc.Interval(id="telemetry-interval", interval=500,
+                             n_intervals=0, disabled=telemetry is None),
                 html.Hr(),
                 dbc.Row([
                     dbc.Col(html.P("Liftoff (T0):", style={
@@ -273,14 +347,11 @@ def render_page_content(pathname):
     )
 
 
-@app.callback(
-    Output("next-pass-info", "children"),
-    [Input("latitude-input", "value"),
-     Input("longitude-input", "value"),
-     Input("elevation-input", "value")]
-)
-def update_next_pass(latitude, longitude, elevation):
-    next_pass_info = NextPassage.NextPass(latitude, longitude, elevation)
+def NextPassInfo(future):
+    if future.exception() is not None:
+        return html.P("Next pass unavailable", style={
+                      "color": "#2C3E50", "font-family": "Roboto"})
+    next_pass_info = future.result()
     rise_time, culminate_time, set_time, culmination_azimuth, culmination_elevation, culmination_distance = next_pass_info
     if all([rise_time, culminate_time, set_time]):
         return html.Div([
@@ -334,6 +405,49 @@ def update_next_pass(latitude, longitude, elevation):
         return html.P("No pass in the next 72 hours")
 
 
+@app.callback(
+    Output("next-pass-info", "children"),
+    Output("next-pass-query", "data"),
+    Output("next-pass-poll", "disabled"),
+    [Input("latitude-input", "value"),
+     Input("longitude-input", "value"),
+     Input("elevation-input", "value")],
+    State("next-pass-query", "data")
+)
+def update_next_pass(latitude, longitude, elevation, previous_query):
+    if None in (latitude, longitude, elevation):
+        return no_update, no_update, no_update
+    query = [round(latitude, 4), round(longitude, 4), round(elevation, 1)]
+    if query == previous_query:
+        return no_update, no_update, no_update
+    if previous_query:
+        BackgroundTasks.Release(tuple(previous_query))
+    future = BackgroundTasks.Submit(
+        tuple(query), NextPassage.NextPass, *query)
+    if future.done():
+        return NextPassInfo(future), query, True
+    return html.P("Computing next pass…", style={
+                  "color": "#2C3E50", "font-family": "Roboto"}), query, False
+
+
+@app.callback(
+    Output("next-pass-info", "children", allow_duplicate=True),
+    Output("next-pass-poll", "disabled", allow_duplicate=True),
+    Input("next-pass-poll", "n_intervals"),
+    State("next-pass-query", "data"),
+    prevent_initial_call=True
+)
+def poll_next_pass(n_intervals, query):
+    future = BackgroundTasks.Get(tuple(query)) if query else None
+    if future is None:
+        # Expired or cancelled, resubmit the current query
+        future = BackgroundTasks.Submit(
+            tuple(query), NextPassage.NextPass, *query)
+    if not future.done():
+        return no_update, no_update
+    return NextPassInfo(future), True
+
+
 @app.callback(
     Output("collapse", "is_open"),
     Output("triangle-icon", "style"),
@@ -352,69 +466,136 @@ def toggle_collapse(n_clicks, is_open):
     return is_open, {"display": "inline-block", "transition": "transform 0.3s ease"}
 
 
+if LIVE_MODE == "client":
+    app.clientside_callback(
+        ClientsideFunction("live_tracking", "move"),
+        Input("interval-component", "n_intervals"),
+        Input("live-tracking-ephemeris", "data"),
+        Input("elevation-input", "value")
+    )
+
+    app.clientside_callback(
+        ClientsideFunction("live_tracking", "observer"),
+        Input("latitude-input", "value"),
+        Input("longitude-input", "value")
+    )
+
+    @app.callback(
+        Output("live-tracking-ephemeris", "data"),
+        Input("ephemeris-interval", "n_intervals"),
+        Input("satellite-select", "value"),
+        prevent_initial_call=True
+    )
+    def update_ephemeris(n_intervals, satellites):
+        return LiveTracking.SharedEphemerisWindow(satellites or ())
+elif LIVE_MODE == "push":
+    app.clientside_callback(
+        ClientsideFunction("live_tracking", "subscribe"),
+        Input("elevation-input", "value"),
+        Input("satellite-select", "value")
+    )
+
+    app.clientside_callback(
+        ClientsideFunction("live_tracking", "observer"),
+        Input("latitude-input", "value"),
+        Input("longitude-input", "value")
+    )
+else:
+    @app.callback(
+        Output("live-tracking-graph", "figure"),
+        Output("live-tracking-track", "data"),
+        [Input("latitude-input", "value"),
+         Input("longitude-input", "value"),
+         Input("elevation-input", "value"),
+         Input("interval-component", "n_intervals"),
+         Input("satellite-select", "value")],
+        State("live-tracking-track", "data")
+    )
+    def update_orbit(latitude, longitude, elevation, n_intervals, satellites, track_key):
+        latitude = latitude if latitude is not None else 48.8566
+        longitude = longitude if longitude is not None else 2.3522
+        elevation = elevation if elevation is not None else 0.0
+        snapshot = LiveTracking.SharedSnapshot(elevation, satellites or ())
+        fig = Patch()
+        fig["data"][LiveTracking.FOOTPRINT_TRACE]["lat"] = snapshot["footprint_lats"]
+        fig["data"][LiveTracking.FOOTPRINT_TRACE]["lon"] = snapshot["footprint_lons"]
+        fig["data"][LiveTracking.POSITION_TRACE]["lat"] = [snapshot["lat"]]
+        fig["data"][LiveTracking.POSITION_TRACE]["lon"] = [snapshot["lon"]]
+        fig["data"][LiveTracking.SATELLITES_TRACE]["lat"] = snapshot["satellites"]["lat"]
+        fig["data"][LiveTracking.SATELLITES_TRACE]["lon"] = snapshot["satellites"]["lon"]
+        fig["data"][LiveTracking.SATELLITES_TRACE]["text"] = snapshot["satellites"]["names"]
+        if ctx.triggered_id in ("latitude-input", "longitude-input"):
+            fig["data"][LiveTracking.OBSERVER_TRACE]["lat"] = [latitude]
+            fig["data"][LiveTracking.OBSERVER_TRACE]["lon"] = [longitude]
+        if snapshot["track_key"] == track_key:
+            return fig, no_update
+        fig["data"][LiveTracking.TRACK_TRACE]["lat"] = snapshot["track_lats"]
+        fig["data"][LiveTracking.TRACK_TRACE]["lon"] = snapshot["track_lons"]
+        return fig, snapshot["track_key"]
+
+
+app.clientside_callback(
+    ClientsideFunction("flight_trajectory", "hover"),
+    Output('photo-caption', 'children'),
+    Output('photo-image', 'src'),
+    Output('photo-image-container', 'style'),
+    Input('flight-trajectory-graph', 'hoverData'),
+    State('flight-trajectory-photos', 'data')
+)
+
+
+def RelayoutRange(relayout_data):
+    # Visible time range of a relayoutData event, None when zoomed out and
+    # False when the x axis did not change
+    if "xaxis.autorange" in relayout_data:
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return float(relayout_data["xaxis.range[0]"]), float(relayout_data["xaxis.range[1]"])
+    if "xaxis.range" in relayout_data:
+        return tuple(float(bound) for bound in relayout_data["xaxis.range"])
+    return False
+
+
 @app.callback(
-    Output("live-tracking-graph", "figure"),
-    [Input("latitude-input", "value"),
-     Input("longitude-input", "value"),
-     Input("interval-component", "n_intervals")]
+    Output("scientific-analysis-graph", "figure"),
+    Input("scientific-analysis-graph", "relayoutData"),
+    prevent_initial_call=True
 )
-def update_orbit(latitude, longitude, n_intervals):
-    latitude = latitude if latitude is not None else 48.8566
-    longitude = longitude if longitude is not None else 2.3522
-    return LiveTracking.ShowOrbit(latitude, longitude)
+def zoom_scientific_plot(relayout_data):
+    t_range = RelayoutRange(relayout_data or {})
+    if t_range is False:
+        return no_update
+    th_columns, photodiode_columns = ScientificAnalysis.TraceNames()
+    fig = Patch()
+    for i, (x, y) in enumerate(ScientificAnalysis.TraceData(th_columns + photodiode_columns, t_range)):
+        fig["data"][i]["x"] = x
+        fig["data"][i]["y"] = y
+    return fig
 
 
 @app.callback(
-    [Output('flight-trajectory-graph', 'figure'),
-     Output('photo-image-container', 'children'),
-     Output('photo-image-container', 'style')],
-    [Input('flight-trajectory-graph', 'hoverData')]
+    Output("scientific-analysis-graph", "extendData"),
+    Output("telemetry-cursor", "data"),
+    Input("telemetry-interval", "n_intervals"),
+    State("telemetry-cursor", "data"),
+    prevent_initial_call=True
 )
-def display_hover_data(hoverData):
-    for idx in visibility_traces:
-        fig.data[idx].visible = False
-    image_content = None
-    image_style = {'display': 'none'}
-    if hoverData:
-        for point in hoverData.get('points', []):
-            if 'customdata' in point:
-                x = point['bbox']['x1']
-                y = point['bbox']['y1']
-                transform = ''
-                if "Photo n°" in point['customdata']:
-                    photo_number = int(point['customdata'].split("n°")[-1])
-                    visibility_idx = visibility_traces[photo_number - 1]
-                    fig.data[visibility_idx].visible = True
-                    image_path = f"assets/photos/photo_{photo_number}.jpg"
-                    image_time = [4166, 4297, 4565, 4925,
-                                  4963, 5006, 5758, 6118, 6522, 6560]
-                    image_content = html.Div([
-                        html.P(f"Photo n°{photo_number} • T0+{image_time[photo_number-1]}s", style={
-                               'color': '#2C3E50', 'font-family': 'Roboto', 'margin': '0'}),
-                        html.Img(src=image_path, style={
-                                 'width': '20rem', 'height': 'auto', 'margin-top': '0.5rem'})
-                    ], style={'background-color': 'rgba(207, 216, 220, 0.5)', 'padding': '0.5rem', 'border-radius': '0.5rem'})
-                    if photo_number in {1, 2}:
-                        x = point['bbox']['x0']
-                        y = point['bbox']['y0']
-                        transform = 'translate(-100%, -100%)'
-                    elif photo_number in {3, 4, 5, 6}:
-                        y = point['bbox']['y0']
-                        transform = 'translateY(-100%)'
-                else:
-                    image_path = f"assets/photos/{point['customdata'][0]}.jpg"
-                    image_content = html.Div([
-                        html.P(f"{point['customdata'][1]}", style={
-                               'color': '#2C3E50', 'font-family': 'Roboto', 'margin': '0'}),
-                        html.Img(src=image_path, style={
-                                 'width': '20rem', 'height': 'auto', 'margin-top': '0.5rem'})
-                    ], style={'background-color': 'rgba(207, 216, 220, 0.5)', 'padding': '0.5rem', 'border-radius': '0.5rem'})
-                image_style = {'position': 'absolute',
-                               'zIndex': 100, 'pointerEvents': 'none'}
-                image_style['left'] = f"{x}px"
-                image_style['top'] = f"{y}px"
-                image_style['transform'] = transform
-    return fig, image_content, image_style
+def extend_telemetry(n_intervals, cursor):
+    # Frames ingested since the last poll of this view, appended to every trace
+    telemetry = Telemetry.View()
+    if telemetry is None:
+        return no_update, no_update
+    times, values, cursor = telemetry.Since(cursor)
+    if not len(times):
+        return no_update, cursor
+    th_columns, photodiode_columns = ScientificAnalysis.TraceNames()
+    names = th_columns + photodiode_columns
+    times = times[-MAX_TELEMETRY_POINTS:]
+    return [
+        {"x": [times] * len(names), "y": [values[name][-MAX_TELEMETRY_POINTS:] for name in names]},
+        list(range(len(names))),
+        MAX_TELEMETRY_POINTS
+    ], cursor
 
 
 @app.callback(
@@ -427,6 +608,118 @@ def download_report(n_clicks):
         return dcc.send_file("assets/GD2143A002-2.0 Rapport d'expérience PariSat.pdf")
 
 
+@server.route("/api/passes", methods=["GET", "POST"])
+def api_passes():
+    # POST {"observers": [{"lat", "lon", "alt", "min_elevation"}, ...], "days", "count"}
+    # or GET ?lat=..&lon=..&min_elevation=.. with repeated lat/lon for several observers
+    if flask.request.method == "POST":
+        query = flask.request.get_json(silent=True)
+        query = query if isinstance(query, dict) else {}
+        observers = query.get("observers") or []
+    else:
+        query = flask.request.args
+        observers = [{"lat": lat, "lon": lon} for lat, lon in zip(
+            query.getlist("lat"), query.getlist("lon"))]
+    try:
+        default_elevation = float(query.get("min_elevation", 0.0))
+        lats = [float(observer["lat"]) for observer in observers]
+        lons = [float(observer["lon"]) for observer in observers]
+        alts = [float(observer.get("alt", 0.0)) for observer in observers]
+        min_elevations = [float(observer.get("min_elevation", default_elevation))
+                          for observer in observers]
+        days = float(query.get("days", PassPrediction.SEARCH_DAYS))
+        count = int(query["count"]) if query.get("count") is not None else None
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return flask.jsonify(error="Malformed observers or parameters"), 400
+    if not observers or len(observers) > MAX_BATCH_OBSERVERS:
+        return flask.jsonify(error=f"Between 1 and {MAX_BATCH_OBSERVERS} observers are required"), 400
+    if not 0 < days <= MAX_BATCH_DAYS:
+        return flask.jsonify(error=f"days must be in ]0, {MAX_BATCH_DAYS}]"), 400
+    # Range checks also reject NaN and infinities
+    if not all(-90.0 <= lat <= 90.0 for lat in lats):
+        return flask.jsonify(error="Latitudes must be in [-90, 90]"), 400
+    if not all(-180.0 <= lon <= 180.0 for lon in lons):
+        return flask.jsonify(error="Longitudes must be in [-180, 180]"), 400
+    if not all(-90.0 <= min_elevation <= 90.0 for min_elevation in min_elevations):
+        return flask.jsonify(error="Minimum elevations must be in [-90, 90]"), 400
+    if not all(-1000.0 <= alt <= 10000.0 for alt in alts):
+        return flask.jsonify(error="Altitudes must be in [-1000, 10000] m"), 400
+
+    passes = PassPrediction.PredictPasses(lats, lons, min_elevations, days=days,
+                                          count=count, observer_alts=alts)
+    return flask.jsonify(norad_id=PassPrediction.NORAD_ID, passes=[
+        [{"rise": rise.isoformat(), "culmination": culmination.isoformat(),
+          "set": set_time.isoformat(), "azimuth": azimuth, "elevation": elevation,
+          "distance_km": distance}
+         for rise, culmination, set_time, azimuth, elevation, distance in observer_passes]
+        for observer_passes in passes])
+
+
+@server.route("/api/skytrack")
+def api_skytrack():
+    # GET ?lat=..&lon=..&min_elevation=..&step=..&frequency=..&format=json|csv
+    # Sampled az/el/range/range rate/Doppler of the next pass, for antenna rotators
+    query = flask.request.args
+    try:
+        lat = float(query["lat"])
+        lon = float(query["lon"])
+        min_elevation = float(query.get("min_elevation", 0.0))
+        step = float(query.get("step", NextPassage.TRACK_STEP))
+        frequency = float(query.get("frequency", NextPassage.DOWNLINK_FREQUENCY))
+    except (KeyError, ValueError):
+        return flask.jsonify(error="Malformed observer or parameters"), 400
+    output_format = query.get("format", "json")
+    if output_format not in ("json", "csv"):
+        return flask.jsonify(error="format must be json or csv"), 400
+    # Range checks also reject NaN and infinities
+    if not -90.0 <= lat <= 90.0:
+        return flask.jsonify(error="Latitude must be in [-90, 90]"), 400
+    if not -180.0 <= lon <= 180.0:
+        return flask.jsonify(error="Longitude must be in [-180, 180]"), 400
+    if not -90.0 <= min_elevation <= 90.0:
+        return flask.jsonify(error="Minimum elevation must be in [-90, 90]"), 400
+    if not 0.0 < frequency < float("inf"):
+        return flask.jsonify(error="frequency must be a positive number of Hz"), 400
+    if not MIN_TRACK_STEP <= step <= MAX_TRACK_STEP:
+        return flask.jsonify(error=f"step must be in [{MIN_TRACK_STEP}, {MAX_TRACK_STEP}]"), 400
+
+    next_pass, track = NextPassage.NextPassTrack(lat, lon, min_elevation, step=step)
+    if track is None:
+        return flask.jsonify(error="No pass in the next 72 hours"), 404
+    if output_format == "csv":
+        rise_time = next_pass[0].strftime("%Y%m%dT%H%M%SZ")
+        return flask.Response(track.ToCSV(frequency), mimetype="text/csv", headers={
+            "Content-Disposition": f"attachment; filename=parisat-pass-{rise_time}.csv"})
+    rise_time, culminate_time, set_time, azimuth, elevation, distance = next_pass
+    return flask.jsonify(
+        norad_id=PassPrediction.NORAD_ID, frequency_hz=frequency, step=step,
+        rise=rise_time.isoformat(), culmination=culminate_time.isoformat(),
+        set=set_time.isoformat(), azimuth=azimuth, elevation=elevation,
+        distance_km=distance, track=track.Rows(frequency))
+
+
+@server.route("/api/live/stream")
+def api_live_stream():
+    # Server-Sent Events: "position" frames every tick, "track" frames when the
+    # ground track rolls, computed once for all subscribers
+    subscriber = LiveBroadcast.Subscribe()
+    if subscriber is None:
+        # An error status closes the EventSource, the browser then polls
+        return flask.jsonify(error="Live stream limit reached, poll /api/live/position"), 503
+    response = flask.Response(LiveBroadcast.Stream(subscriber), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Also frees the slot when the client leaves before the stream started
+    response.call_on_close(lambda: LiveBroadcast.Unsubscribe(subscriber))
+    return response
+
+
+@server.route("/api/live/position")
+def api_live_position():
+    # GET ?track_key=.. the latest "position" frame, with the "track" frame
+    # when the ground track differs from track_key
+    return flask.jsonify(LiveBroadcast.Poll(flask.request.args.get("track_key")))
+
+
 if __name__ == "__main__":
     app.run_server(debug=True)
 
@@ -0,0 +1,68 @@
+window.dash_clientside = window.dash_clientside || {};
+
+(function () {
+    function plotlyDiv(id) {
+        const container = document.getElementById(id);
+        return container ? container.querySelector('.js-plotly-plot') : null;
+    }
+
+    function showVisibility(photos, shown) {
+        // Only this browser's copy of the figure is touched, hover state is never shared
+        const graph = plotlyDiv('flight-trajectory-graph');
+        if (!graph || graph._parisatShownVisibility === shown) {
+            return;
+        }
+        graph._parisatShownVisibility = shown;
+        const indices = photos.visibility_traces;
+        Plotly.restyle(graph, {
+            visible: indices.map(function (idx) { return idx === shown; })
+        }, indices);
+    }
+
+    window.dash_clientside.flight_trajectory = {
+        hover: function (hoverData, photos) {
+            const noUpdate = window.dash_clientside.no_update;
+            let caption = noUpdate;
+            let src = noUpdate;
+            let style = {display: 'none'};
+            let shown = null;
+            const points = hoverData ? hoverData.points || [] : [];
+            points.forEach(function (point) {
+                if (!('customdata' in point)) {
+                    return;
+                }
+                let x = point.bbox.x1;
+                let y = point.bbox.y1;
+                let transform = '';
+                const customdata = point.customdata;
+                if (typeof customdata === 'string' && customdata.indexOf('Photo n°') !== -1) {
+                    const photoNumber = parseInt(customdata.split('n°').pop(), 10);
+                    shown = photos.visibility_traces[photoNumber - 1];
+                    src = 'assets/photos/photo_' + photoNumber + '.jpg';
+                    caption = 'Photo n°' + photoNumber + ' • T0+' + photos.image_time[photoNumber - 1] + 's';
+                    if (photoNumber === 1 || photoNumber === 2) {
+                        x = point.bbox.x0;
+                        y = point.bbox.y0;
+                        transform = 'translate(-100%, -100%)';
+                    } else if (photoNumber >= 3 && photoNumber <= 6) {
+                        y = point.bbox.y0;
+                        transform = 'translateY(-100%)';
+                    }
+                } else {
+                    src = 'assets/photos/' + customdata[0] + '.jpg';
+                    caption = customdata[1];
+                }
+                style = {
+                    position: 'absolute',
+                    zIndex: 100,
+                    pointerEvents: 'none',
+                    left: x + 'px',
+                    top: y + 'px',
+                    transform: transform
+                };
+            });
+            showVisibility(photos, shown);
+            return [caption, src, style];
+        }
+    };
+})();
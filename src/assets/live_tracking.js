@@ -0,0 +1,262 @@
+window.dash_clientside = window.dash_clientside || {};
+
+(function () {
+    // Trace indices of the live-tracking figure (see modules/LiveTracking.py)
+    const FOOTPRINT_TRACE = 1;
+    const OBSERVER_TRACE = 2;
+    const TRACK_TRACE = 3;
+    const POSITION_TRACE = 4;
+    const SATELLITES_TRACE = 5;
+    const EARTH_RADIUS_KM = 6371.0;
+    // Stream or poll timer, and drawing options of the "push" live mode
+    const POLL_INTERVAL_MS = 2000;
+    const pushState = {source: null, poll: null, trackKey: null, minElevation: 0, satellites: []};
+
+    function plotlyDiv(id) {
+        const container = document.getElementById(id);
+        return container ? container.querySelector('.js-plotly-plot') : null;
+    }
+
+    function interpolate(times, values, t) {
+        if (t <= times[0]) {
+            return values[0];
+        }
+        if (t >= times[times.length - 1]) {
+            return values[values.length - 1];
+        }
+        let lo = 0;
+        let hi = times.length - 1;
+        while (hi - lo > 1) {
+            const mid = (lo + hi) >> 1;
+            if (times[mid] <= t) {
+                lo = mid;
+            } else {
+                hi = mid;
+            }
+        }
+        const f = (t - times[lo]) / (times[hi] - times[lo]);
+        return values[lo] + f * (values[hi] - values[lo]);
+    }
+
+    function coverageAngle(altitudeKm, minElevation) {
+        // Mirrors modules/Footprint.py
+        const elevation = minElevation * Math.PI / 180;
+        return Math.acos(EARTH_RADIUS_KM * Math.cos(elevation) / (EARTH_RADIUS_KM + altitudeKm)) - elevation;
+    }
+
+    function clip(lons, lats, limit, keepBelow) {
+        const outLons = [];
+        const outLats = [];
+        const n = lons.length;
+        for (let i = 0; i < n; i++) {
+            const j = (i + 1) % n;
+            const inside = keepBelow ? lons[i] <= limit : lons[i] >= limit;
+            const nextInside = keepBelow ? lons[j] <= limit : lons[j] >= limit;
+            if (inside) {
+                outLons.push(lons[i]);
+                outLats.push(lats[i]);
+            }
+            if (inside !== nextInside) {
+                const f = (limit - lons[i]) / (lons[j] - lons[i]);
+                outLons.push(limit);
+                outLats.push(lats[i] + f * (lats[j] - lats[i]));
+            }
+        }
+        return [outLons, outLats];
+    }
+
+    function join(pieces) {
+        const lats = [];
+        const lons = [];
+        pieces.forEach(function (piece) {
+            if (piece[0].length < 3) {
+                return;
+            }
+            if (lats.length) {
+                lats.push(null);
+                lons.push(null);
+            }
+            lons.push.apply(lons, piece[0]);
+            lats.push.apply(lats, piece[1]);
+        });
+        return [lats, lons];
+    }
+
+    function footprint(lat, lon, altitudeKm, minElevation, numPoints) {
+        const lat0 = lat * Math.PI / 180;
+        const angle = coverageAngle(altitudeKm, minElevation);
+        let lats = [];
+        let lons = [];
+        for (let i = 0; i < numPoints; i++) {
+            const bearing = 2 * Math.PI * i / numPoints;
+            const pointLat = Math.asin(Math.sin(lat0) * Math.cos(angle)
+                + Math.cos(lat0) * Math.sin(angle) * Math.cos(bearing));
+            const dlon = Math.atan2(Math.sin(bearing) * Math.sin(angle) * Math.cos(lat0),
+                Math.cos(angle) - Math.sin(lat0) * Math.sin(pointLat));
+            lats.push(pointLat * 180 / Math.PI);
+            lons.push(lon + dlon * 180 / Math.PI);
+        }
+
+        if (Math.abs(lat) + angle * 180 / Math.PI >= 90) {
+            // The footprint contains a pole: close the ring along the map edges through the pole
+            const points = lons.map(function (pointLon, i) {
+                return [((pointLon + 180) % 360 + 360) % 360 - 180, lats[i]];
+            }).sort(function (a, b) { return a[0] - b[0]; });
+            const first = points[0];
+            const last = points[points.length - 1];
+            const f = (first[0] + 360 - last[0]) === 0 ? 0 : (180 - last[0]) / (first[0] + 360 - last[0]);
+            const edgeLat = last[1] + f * (first[1] - last[1]);
+            points.unshift([-180, edgeLat]);
+            points.push([180, edgeLat]);
+            const pole = lat > 0 ? 90 : -90;
+            if (pole > 0) {
+                points.reverse();
+            }
+            points.push([points[points.length - 1][0], pole], [points[0][0], pole]);
+            return join([[points.map(function (p) { return p[0]; }), points.map(function (p) { return p[1]; })]]);
+        }
+
+        const maxLon = Math.max.apply(null, lons);
+        const minLon = Math.min.apply(null, lons);
+        if (maxLon > 180) {
+            const east = clip(lons, lats, 180, false);
+            return join([clip(lons, lats, 180, true),
+                [east[0].map(function (x) { return x - 360; }), east[1]]]);
+        }
+        if (minLon < -180) {
+            const west = clip(lons, lats, -180, true);
+            return join([clip(lons, lats, -180, false),
+                [west[0].map(function (x) { return x + 360; }), west[1]]]);
+        }
+        return join([[lons, lats]]);
+    }
+
+    function drawTrack(graph, track) {
+        Plotly.restyle(graph, {lat: [track.lat], lon: [track.lon]}, [TRACK_TRACE]);
+    }
+
+    function drawPosition(graph, frame, state) {
+        const circle = footprint(frame.lat, frame.lon, frame.alt, state.minElevation, 100);
+        const others = frame.satellites;
+        const shown = others.ids.map(function (id, i) {
+            return state.satellites.indexOf(id) >= 0 ? i : -1;
+        }).filter(function (i) { return i >= 0; });
+        Plotly.restyle(graph, {
+            lat: [circle[0], [frame.lat], shown.map(function (i) { return others.lat[i]; })],
+            lon: [circle[1], [frame.lon], shown.map(function (i) { return others.lon[i]; })],
+            text: [undefined, undefined, shown.map(function (i) { return others.names[i]; })]
+        }, [FOOTPRINT_TRACE, POSITION_TRACE, SATELLITES_TRACE]);
+    }
+
+    function poll(state) {
+        // Fallback once the server has no stream left for this page
+        const graph = plotlyDiv('live-tracking-graph');
+        if (!graph) {
+            clearInterval(state.poll);
+            state.poll = null;
+            state.trackKey = null;
+            return;
+        }
+        fetch('/api/live/position?track_key=' + encodeURIComponent(state.trackKey || ''))
+            .then(function (response) { return response.ok ? response.json() : null; })
+            .then(function (frames) {
+                if (!frames) {
+                    return;
+                }
+                if (frames.track) {
+                    drawTrack(graph, frames.track);
+                    state.trackKey = frames.track_key;
+                }
+                drawPosition(graph, frames.position, state);
+            })
+            .catch(function () {});
+    }
+
+    window.dash_clientside.live_tracking = {
+        move: function (n_intervals, ephemeris, minElevation) {
+            const graph = plotlyDiv('live-tracking-graph');
+            if (!graph || !ephemeris || !ephemeris.t.length) {
+                return;
+            }
+            if (graph._parisatWindow !== ephemeris.now) {
+                // Align the browser clock on the server clock once per window
+                graph._parisatWindow = ephemeris.now;
+                graph._parisatClockOffset = ephemeris.now - Date.now() / 1000;
+                Plotly.restyle(graph, {
+                    lat: [ephemeris.track_lats],
+                    lon: [ephemeris.track_lons]
+                }, [TRACK_TRACE]);
+            }
+            const t = Date.now() / 1000 + graph._parisatClockOffset;
+            const lat = interpolate(ephemeris.t, ephemeris.lat, t);
+            const lon = ((interpolate(ephemeris.t, ephemeris.lon, t) + 180) % 360 + 360) % 360 - 180;
+            const altitude = interpolate(ephemeris.t, ephemeris.alt, t);
+            const circle = footprint(lat, lon, altitude, minElevation || 0, 100);
+            const satellites = ephemeris.satellites || {names: [], t: [], lat: [], lon: []};
+            const satelliteLats = satellites.lat.map(function (lats) {
+                return interpolate(satellites.t, lats, t);
+            });
+            const satelliteLons = satellites.lon.map(function (lons) {
+                return ((interpolate(satellites.t, lons, t) + 180) % 360 + 360) % 360 - 180;
+            });
+            Plotly.restyle(graph, {
+                lat: [circle[0], [lat], satelliteLats],
+                lon: [circle[1], [lon], satelliteLons],
+                text: [undefined, undefined, satellites.names]
+            }, [FOOTPRINT_TRACE, POSITION_TRACE, SATELLITES_TRACE]);
+        },
+
+        subscribe: function (minElevation, satellites) {
+            // One EventSource per page, the inputs only change how frames are drawn
+            const state = pushState;
+            state.minElevation = minElevation || 0;
+            state.satellites = satellites || [];
+            if (state.source || state.poll) {
+                return;
+            }
+            const source = new EventSource('/api/live/stream');
+            state.source = source;
+            function graphOrClose() {
+                const graph = plotlyDiv('live-tracking-graph');
+                if (!graph) {
+                    // The live page was left, the next subscribe reopens the stream
+                    source.close();
+                    state.source = null;
+                }
+                return graph;
+            }
+            source.addEventListener('track', function (event) {
+                const graph = graphOrClose();
+                if (graph) {
+                    drawTrack(graph, JSON.parse(event.data));
+                }
+            });
+            source.addEventListener('position', function (event) {
+                const graph = graphOrClose();
+                if (graph) {
+                    drawPosition(graph, JSON.parse(event.data), state);
+                }
+            });
+            source.addEventListener('error', function () {
+                // Network errors reconnect by themselves, a refused stream
+                // (every slot of the worker taken) closes the source
+                if (source.readyState === EventSource.CLOSED && state.source === source) {
+                    state.source = null;
+                    state.poll = setInterval(function () { poll(state); }, POLL_INTERVAL_MS);
+                    poll(state);
+                }
+            });
+        },
+
+        observer: function (latitude, longitude) {
+            const graph = plotlyDiv('live-tracking-graph');
+            if (!graph || latitude == null || longitude == null) {
+                return;
+            }
+            Plotly.restyle(graph, {
+                lat: [[latitude]],
+                lon: [[longitude]]
+            }, [OBSERVER_TRACE]);
+        }
+    };
+})();
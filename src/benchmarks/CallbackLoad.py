@@ -0,0 +1,256 @@
+import argparse
+import datetime
+import http.server
+import json
+import os
+import signal
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import requests
+from benchmarks.LiveViewers import Serve
+from benchmarks.WorkerMemory import Children, Memory
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "CallbackLoad.json")
+# Published elements of the tracked satellites, served with today's epoch so
+# the propagation stays in range whenever the suite runs
+TLE_TEMPLATES = {
+    60239: ("PARISAT",
+            "1 60239U 24149CR  26290.50000000  .00020000  00000-0  80000-3 0  9997",
+            "2 60239  51.6300 120.0000 0005000  90.0000 270.0000 15.55000000 10000"),
+    25544: ("ISS (ZARYA)",
+            "1 25544U 98067A   26290.50000000  .00016717  00000-0  10270-3 0  9999",
+            "2 25544  51.6400 200.0000 0006703 130.5360 325.0288 15.50000000 10004"),
+}
+OBSERVERS = [(round(-60.0 + 120.0 * i / 19, 4), round(-180.0 + 360.0 * (i * 7 % 20) / 20, 4)) for i in range(20)]
+
+
+def Checksum(line):
+    return sum(int(c) if c.isdigit() else c == "-" for c in line[:68]) % 10
+
+
+def StubTLE(norad_cat_id, now=None):
+    name, line1, line2 = TLE_TEMPLATES[norad_cat_id]
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    day = now.timetuple().tm_yday + (now.hour * 3600 + now.minute * 60 + now.second) / 86400
+    line1 = f"{line1[:18]}{now.year % 100:02d}{day:012.8f}{line1[32:68]}"
+    return {"tle0": name, "tle1": f"{line1}{Checksum(line1)}", "tle2": line2, "norad_cat_id": norad_cat_id}
+
+
+class SatnogsStub(http.server.BaseHTTPRequestHandler):
+    # Answers /api/tle/?norad_cat_id=N like the SatNOGS DB, so the suite
+    # never leaves the machine
+    def do_GET(self):
+        query = dict(part.split("=", 1) for part in self.path.partition("?")[2].split("&") if "=" in part)
+        try:
+            body = json.dumps([StubTLE(int(query["norad_cat_id"]))]).encode()
+        except (KeyError, ValueError):
+            body = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def StartStub():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SatnogsStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def UpdateOrbit(i):
+    return {
+        "output": "..live-tracking-graph.figure...live-tracking-track.data..",
+        "outputs": [{"id": "live-tracking-graph", "property": "figure"},
+                    {"id": "live-tracking-track", "property": "data"}],
+        "inputs": [{"id": "latitude-input", "property": "value", "value": 48.8566},
+                   {"id": "longitude-input", "property": "value", "value": 2.3522},
+                   {"id": "elevation-input", "property": "value", "value": 0.0},
+                   {"id": "interval-component", "property": "n_intervals", "value": i},
+                   {"id": "satellite-select", "property": "value", "value": []}],
+        "state": [{"id": "live-tracking-track", "property": "data", "value": None}],
+        "changedPropIds": ["interval-component.n_intervals"]}
+
+
+def UpdateNextPass(i):
+    # Observers cycle through a fixed set, so the suite sees both queries in
+    # progress and queries already answered
+    latitude, longitude = OBSERVERS[i % len(OBSERVERS)]
+    return {
+        "output": "..next-pass-info.children...next-pass-query.data...next-pass-poll.disabled..",
+        "outputs": [{"id": "next-pass-info", "property": "children"},
+                    {"id": "next-pass-query", "property": "data"},
+                    {"id": "next-pass-poll", "property": "disabled"}],
+        "inputs": [{"id": "latitude-input", "property": "value", "value": latitude},
+                   {"id": "longitude-input", "property": "value", "value": longitude},
+                   {"id": "elevation-input", "property": "value", "value": 10.0}],
+        "state": [{"id": "next-pass-query", "property": "data", "value": None}],
+        "changedPropIds": ["latitude-input.value"]}
+
+
+def RenderPage(pathname):
+    def Request(i):
+        return {
+            "output": "..page-content.children...live-tracking-input.children..",
+            "outputs": [{"id": "page-content", "property": "children"},
+                        {"id": "live-tracking-input", "property": "children"}],
+            "inputs": [{"id": "url", "property": "pathname", "value": pathname}],
+            "changedPropIds": ["url.pathname"]}
+    return Request
+
+
+# display_hover_data runs in the browser since the photo hover became a
+# clientside callback, the flight page render ships the data it reads
+SCENARIOS = {
+    "update_orbit": UpdateOrbit,
+    "update_next_pass": UpdateNextPass,
+    "flight_page": RenderPage("/flight-trajectory"),
+    "scientific_page": RenderPage("/scientific-analysis"),
+}
+
+
+def Client(port, request, stop, samples, errors, offset):
+    session = requests.Session()
+    i = offset
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            response = session.post(f"http://127.0.0.1:{port}/_dash-update-component",
+                                    json=request(i), timeout=60)
+            response.raise_for_status()
+            samples.append((time.perf_counter() - start, len(response.content)))
+        except requests.RequestException as error:
+            errors.append(error)
+        i += 1
+
+
+def WorkerRSS(pid):
+    # Resident memory of every worker in MB
+    return [Memory(child)["Rss"] / 1024 for child in Children(pid)]
+
+
+def Run(port, request, concurrency, duration):
+    # Closed loop: every client sends its next request as soon as the last
+    # one is answered, so the throughput is the saturation point
+    stop = threading.Event()
+    samples, errors = [], []
+    clients = [threading.Thread(target=Client, args=(port, request, stop, samples, errors, n * 1000))
+               for n in range(concurrency)]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    time.sleep(duration)
+    stop.set()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        print(f"  first error: {errors[0]!r}")
+    latencies = [latency * 1000 for latency, _ in samples]
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [float("inf")] * 99
+    return {
+        "requests": len(samples),
+        "errors": len(errors),
+        "throughput": round(len(samples) / elapsed, 1),
+        "p50": round(percentiles[49], 2),
+        "p95": round(percentiles[94], 2),
+        "p99": round(percentiles[98], 2),
+        "bytes": round(statistics.mean(size for _, size in samples)) if samples else 0,
+    }
+
+
+def Regressions(results, baseline, threshold):
+    # Slower p95 or lower throughput than the baseline by more than threshold
+    found = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if result["errors"]:
+            found.append(f"{key}: {result['errors']} errors")
+        if result["p95"] > reference["p95"] * (1 + threshold):
+            found.append(f"{key}: p95 {result['p95']:.1f} ms against {reference['p95']:.1f} ms")
+        if result["throughput"] < reference["throughput"] * (1 - threshold):
+            found.append(f"{key}: {result['throughput']:.1f} req/s against {reference['throughput']:.1f} req/s")
+    return found
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Throughput, latency, payload and worker memory of the Dash callbacks "
+                    "under concurrent clients, against a local SatNOGS stub")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative p95 or throughput change reported as a regression")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline instead of comparing")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    stub = StartStub()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Fresh TLE and empty live stores, the results do not depend on what
+        # the checkout has cached
+        os.environ.update({
+            "PARISAT_SATNOGS_URL": f"http://127.0.0.1:{stub.server_port}/api/tle/",
+            "PARISAT_TLE_CACHE_DIR": os.path.join(tmp_dir, "tle"),
+            "PARISAT_TELEMETRY_STORE": os.path.join(tmp_dir, "telemetry"),
+            "PARISAT_CACHE_URL": "memory",
+        })
+        server = Serve(args.worker_class, args.workers, args.port)
+        try:
+            results = {}
+            for scenario in args.scenarios:
+                request = SCENARIOS[scenario]
+                # Imports, TLE and pass tables are loaded before timing
+                for i in range(args.workers * 4):
+                    requests.post(f"http://127.0.0.1:{args.port}/_dash-update-component",
+                                  json=request(i), timeout=120).raise_for_status()
+                for concurrency in args.concurrency:
+                    result = Run(args.port, request, concurrency, args.duration)
+                    result["rss"] = round(max(WorkerRSS(server.pid), default=0), 1)
+                    results[f"{scenario}@{concurrency}"] = result
+                    print(f"{scenario:<16} c={concurrency:<3} {result['throughput']:8.1f} req/s  "
+                          f"p50 {result['p50']:8.1f}  p95 {result['p95']:8.1f}  p99 {result['p99']:8.1f} ms  "
+                          f"{result['bytes'] / 1024:8.1f} KB  worker RSS {result['rss']:6.1f} MB  "
+                          f"{result['errors']} errors")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+            stub.shutdown()
+
+    settings = {"worker_class": args.worker_class, "workers": args.workers, "duration": args.duration}
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=1)
+        print(f"baseline written to {args.baseline}")
+        sys.exit(0)
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except OSError:
+        print("no baseline, run with --save-baseline first")
+        sys.exit(0)
+    if baseline["settings"] != settings:
+        print(f"baseline was measured with {baseline['settings']}, comparing anyway")
+    regressions = Regressions(results, baseline["results"], args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"no regression beyond {args.threshold:.0%} of the baseline")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,233 @@
+import argparse
+import importlib.metadata
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io.json
+from benchmarks.CallbackLoad import StartStub
+import modules.Footprint as Footprint
+import modules.Geodetic as Geodetic
+import modules.LiveTracking as LiveTracking
+import modules.NextPassage as NextPassage
+import modules.PassPrediction as PassPrediction
+import modules.TLEProvider as TLEProvider
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(BENCHMARKS_DIR, "history", "HotPaths.jsonl")
+PACKAGES = ["numpy", "sgp4", "skyfield", "astropy", "poliastro", "plotly", "dash"]
+REPEAT = 5
+
+
+def Observers(n_observers, seed=0):
+    rng = np.random.default_rng(seed)
+    return (np.degrees(np.arcsin(rng.uniform(-0.9, 0.9, n_observers))),
+            rng.uniform(-180.0, 180.0, n_observers))
+
+
+def FlightOrbit():
+    # poliastro is only needed by the flight trajectory cases
+    import modules.FlightTrajectory as FlightTrajectory
+    return FlightTrajectory, FlightTrajectory.OrbitFromTLE(FlightTrajectory.GetTLE())
+
+
+def OrbitFromTLE(_):
+    FlightTrajectory, _ = FlightOrbit()
+    tle = FlightTrajectory.GetTLE()
+    return lambda: FlightTrajectory.OrbitFromTLE(tle)
+
+
+def GroundTrack(points):
+    # Geodetic track of the flight, what LatLon became once vectorized
+    from astropy import units as u
+    FlightTrajectory, orbit = FlightOrbit()
+    t_span = orbit.epoch + np.linspace(0.0, 10874.28 - 3955.92, points) * u.s
+    return lambda: FlightTrajectory.GroundTrack(orbit, t_span)
+
+
+def GroundtrackPlotterPlot(points):
+    # poliastro's own ground track rendering, the flight page used it before
+    # its trace was built from GroundTrack
+    from astropy import units as u
+    from poliastro.earth.plotting import GroundtrackPlotter
+    _, orbit = FlightOrbit()
+    t_span = orbit.epoch + np.linspace(0.0, 10874.28 - 3955.92, points) * u.s
+    return lambda: GroundtrackPlotter().plot(orbit, t_span, label="Trajectory", color="#FFB703")
+
+
+def TEMEToGeodetic(points):
+    rng = np.random.default_rng(0)
+    r = rng.normal(size=(points, 3))
+    r *= 6900.0 / np.linalg.norm(r, axis=1)[:, None]
+    jd = np.full(points, 2461330.5)
+    fr = np.linspace(0.0, 0.5, points)
+    return lambda: Geodetic.TEMEToGeodetic(r, jd, fr)
+
+
+def FootprintPolygon(points):
+    # Steady state of the tick, the shape of the quantized latitude is cached
+    return lambda: Footprint.FootprintPolygon(48.85, 2.35, 520.0, 0.0, points)
+
+
+def FootprintPolygonCold(points):
+    # What GenerateCirclePoints cost per call, before the shape cache
+    def Run():
+        Footprint._Shape.cache_clear()
+        Footprint.FootprintPolygon(48.85, 2.35, 520.0, 0.0, points)
+    return Run
+
+
+def FindNextPass(observers):
+    # skyfield's event search, one observer after the other on a shared context
+    context = NextPassage.Context()
+    satellite = context.Satellite(*NextPassage.GetTLE(60239))
+    sites = [context.Observer(lat, lon) for lat, lon in zip(*Observers(observers))]
+    t = context.ts.now()
+    return lambda: [NextPassage.FindNextPass(satellite, site, t, 10.0) for site in sites]
+
+
+def PredictPasses(observers):
+    lats, lons = Observers(observers)
+    t = time.time()
+    return lambda: PassPrediction.PredictPasses(lats, lons, 10.0, t=t, processes=0)
+
+
+def Snapshot(_):
+    # Everything the server computes per live tick, the ephemeris table warm
+    LiveTracking.Snapshot()
+    return lambda: LiveTracking.Snapshot()
+
+
+def FigureJSON(points):
+    # Dash's serialization of a map figure with a trace of that many points
+    fig = LiveTracking.MapFigure()
+    lats, lons = Observers(points)
+    fig.add_trace(go.Scattergeo(lat=np.round(lats, 4).tolist(), lon=np.round(lons, 4).tolist(), mode="lines"))
+    return lambda: plotly.io.json.to_json_plotly(fig)
+
+
+def LiveFigureJSON(_):
+    fig = LiveTracking.ShowOrbit(snapshot=LiveTracking.Snapshot())
+    return lambda: plotly.io.json.to_json_plotly(fig)
+
+
+# name: (parameter, values, setup), setup returns the call to time
+CASES = {
+    "orbit_from_tle": (None, [None], OrbitFromTLE),
+    "ground_track": ("points", [60, 600, 6000], GroundTrack),
+    "groundtrack_plotter": ("points", [60, 600, 6000], GroundtrackPlotterPlot),
+    "teme_to_geodetic": ("points", [1, 100, 10000], TEMEToGeodetic),
+    "footprint": ("points", [50, 100, 400], FootprintPolygon),
+    "footprint_cold": ("points", [50, 100, 400], FootprintPolygonCold),
+    "find_next_pass": ("observers", [1, 5, 20], FindNextPass),
+    "predict_passes": ("observers", [10, 100, 1000], PredictPasses),
+    "live_snapshot": (None, [None], Snapshot),
+    "figure_json": ("points", [100, 1000, 10000], FigureJSON),
+    "live_figure_json": (None, [None], LiveFigureJSON),
+}
+
+
+def Measure(fn):
+    # Per call time in µs: best and median of REPEAT rounds, each round long
+    # enough (at least 0.2 s) for the timer resolution not to matter
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    rounds = [seconds / number * 1e6 for seconds in timer.repeat(repeat=REPEAT, number=number)]
+    return min(rounds), statistics.median(rounds)
+
+
+def Versions():
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def Commit():
+    def Git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True,
+                              cwd=BENCHMARKS_DIR).stdout.strip()
+    return Git("rev-parse", "--short", "HEAD") or None, bool(Git("status", "--porcelain", "--untracked-files=no"))
+
+
+def History(path=HISTORY_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Per call cost of the orbital math hot paths, compared with the last recorded commit")
+    parser.add_argument("cases", nargs="*", help=f"cases to run, among {', '.join(CASES)} (all by default)")
+    # Sub-100 µs cases vary by a third between runs on a shared machine
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="relative slowdown of the best time reported as a regression")
+    parser.add_argument("--record", action="store_true",
+                        help=f"append the results to {os.path.relpath(HISTORY_PATH)}")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    args = parser.parse_args()
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    # Elements with today's epoch from the local SatNOGS stub into an empty
+    # cache, so nothing leaves the machine and the propagation stays in range
+    stub = StartStub()
+    tmp_dir = tempfile.TemporaryDirectory()
+    TLEProvider.SATNOGS_URL = f"http://127.0.0.1:{stub.server_port}/api/tle/"
+    TLEProvider.CACHE_DIR = tmp_dir.name
+
+    history = History(args.history)
+    previous = history[-1] if history else None
+    results = {}
+    for name in args.cases or CASES:
+        parameter, values, setup = CASES[name]
+        for value in values:
+            key = name if parameter is None else f"{name}[{parameter}={value}]"
+            try:
+                fn = setup(value)
+            except ImportError as error:
+                print(f"{key:<40} skipped, {error.name} is not installed")
+                break
+            best, median = Measure(fn)
+            results[key] = round(best, 2)
+            line = f"{key:<40} best {best:12.2f} µs   median {median:12.2f} µs"
+            reference = previous["results"].get(key) if previous else None
+            if reference:
+                line += f"   {best / reference:5.2f}x {previous['commit']}"
+                if best > reference * (1 + args.threshold):
+                    line += "  REGRESSION"
+            print(line)
+    stub.shutdown()
+    tmp_dir.cleanup()
+
+    commit, dirty = Commit()
+    versions = Versions()
+    if previous:
+        changed = {package: (previous["versions"].get(package), version)
+                   for package, version in versions.items() if previous["versions"].get(package) != version}
+        for package, (before, after) in changed.items():
+            print(f"{package} {before} -> {after} since {previous['commit']}")
+    if args.record:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"commit": commit, "dirty": dirty, "time": round(time.time()),
+                                "python": sys.version.split()[0], "versions": versions,
+                                "results": results}) + "\n")
+        print(f"recorded for {commit}{' (uncommitted changes)' if dirty else ''} in {args.history}")
+    regressed = previous and any(
+        key in previous["results"] and best > previous["results"][key] * (1 + args.threshold)
+        for key, best in results.items())
+    sys.exit(1 if regressed else 0)
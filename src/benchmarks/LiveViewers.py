@@ -0,0 +1,126 @@
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import requests
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TICK_SECONDS = 2.0
+
+
+def UpdateOrbit(session, port, n_intervals):
+    # The server live mode tick of one viewer
+    response = session.post(f"http://127.0.0.1:{port}/_dash-update-component", timeout=30, json={
+        "output": "..live-tracking-graph.figure...live-tracking-track.data..",
+        "outputs": [{"id": "live-tracking-graph", "property": "figure"},
+                    {"id": "live-tracking-track", "property": "data"}],
+        "inputs": [{"id": "latitude-input", "property": "value", "value": 48.8566},
+                   {"id": "longitude-input", "property": "value", "value": 2.3522},
+                   {"id": "elevation-input", "property": "value", "value": 0.0},
+                   {"id": "interval-component", "property": "n_intervals", "value": n_intervals},
+                   {"id": "satellite-select", "property": "value", "value": []}],
+        "state": [{"id": "live-tracking-track", "property": "data", "value": None}],
+        "changedPropIds": ["interval-component.n_intervals"]})
+    response.raise_for_status()
+
+
+def NextPassPoll(session, port):
+    # A viewer opening the next pass panel, each one on another observer so
+    # the pass search is not cached
+    latitude = round(-60.0 + 120.0 * (time.time() % 1.0), 4)
+    response = session.post(f"http://127.0.0.1:{port}/_dash-update-component", timeout=30, json={
+        "output": "..next-pass-info.children...next-pass-query.data...next-pass-poll.disabled..",
+        "outputs": [{"id": "next-pass-info", "property": "children"},
+                    {"id": "next-pass-query", "property": "data"},
+                    {"id": "next-pass-poll", "property": "disabled"}],
+        "inputs": [{"id": "latitude-input", "property": "value", "value": latitude},
+                   {"id": "longitude-input", "property": "value", "value": 2.3522},
+                   {"id": "elevation-input", "property": "value", "value": 10.0}],
+        "state": [{"id": "next-pass-query", "property": "data", "value": None}],
+        "changedPropIds": ["latitude-input.value"]})
+    response.raise_for_status()
+
+
+def Viewer(port, stop, latencies, errors, next_pass_every):
+    session = requests.Session()
+    n_intervals = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            if next_pass_every and n_intervals % next_pass_every == next_pass_every - 1:
+                NextPassPoll(session, port)
+            UpdateOrbit(session, port, n_intervals)
+            latencies.append(time.perf_counter() - start)
+        except requests.RequestException as error:
+            errors.append(error)
+        n_intervals += 1
+        stop.wait(max(0.0, TICK_SECONDS - (time.perf_counter() - start)))
+
+
+def Run(port, viewers, duration, next_pass_every):
+    stop = threading.Event()
+    latencies, errors = [], []
+    threads = [threading.Thread(target=Viewer, args=(port, stop, latencies, errors, next_pass_every))
+               for _ in range(viewers)]
+    for thread in threads:
+        thread.start()
+        time.sleep(TICK_SECONDS / viewers)
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if errors:
+        print(f"  first error: {errors[0]!r}")
+    if len(latencies) < 2:
+        return float("inf"), len(errors)
+    return statistics.quantiles(latencies, n=20)[-1], len(errors)
+
+
+def Serve(worker_class, workers, port):
+    env = dict(os.environ, PARISAT_WORKER_CLASS=worker_class, PARISAT_LIVE_MODE="server")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(SRC_DIR, "gunicorn.conf.py"),
+         "-w", str(workers), "-b", f"127.0.0.1:{port}", "app:server"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while True:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=5)
+            return server
+        except requests.ConnectionError:
+            if time.time() > deadline:
+                server.kill()
+                raise
+            time.sleep(0.5)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Concurrent live viewers one instance sustains, a viewer ticks every 2 s "
+                    "and is sustained while the p95 latency stays under the tick")
+    parser.add_argument("--worker-classes", nargs="+", default=["sync", "gthread"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--viewers", type=int, nargs="+", default=[10, 25, 50, 100, 200])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--next-pass-every", type=int, default=5,
+                        help="ticks between next pass queries of a viewer, 0 for none")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    for worker_class in args.worker_classes:
+        server = Serve(worker_class, args.workers, args.port)
+        try:
+            sustained = 0
+            for viewers in args.viewers:
+                p95, n_errors = Run(args.port, viewers, args.duration, args.next_pass_every)
+                print(f"{worker_class:<8} {viewers:4d} viewers: p95 {p95 * 1000:8.1f} ms, {n_errors} errors")
+                if p95 >= TICK_SECONDS or n_errors:
+                    break
+                sustained = viewers
+            print(f"{worker_class}: sustains {sustained} live viewers with {args.workers} workers")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
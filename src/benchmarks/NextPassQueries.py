@@ -0,0 +1,68 @@
+import argparse
+import statistics
+import time
+from skyfield.api import Topos, load
+from skyfield.sgp4lib import EarthSatellite
+import modules.NextPassage as NextPassage
+
+OBSERVERS = [
+    (48.8566, 2.3522, 0.0),
+    (48.8566, 2.3522, 45.0),
+    (5.2360, -52.7750, 10.0),
+    (67.8897, 21.1042, 30.0),
+    (-33.8688, 151.2093, 0.0),
+]
+
+
+def Measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(samples), max(samples)
+
+
+def Report(name, median_ms, max_ms):
+    print(f"{name:<40} median {median_ms:8.3f} ms   max {max_ms:8.3f} ms")
+
+
+def FreshContextQuery():
+    # Rebuilds the timescale, the satellite, the observers and the pass table
+    # like every call used to
+    for observer_lat, observer_lon, min_elevation in OBSERVERS:
+        NextPassage._context = None
+        with NextPassage._lock:
+            NextPassage._tables.clear()
+        NextPassage.NextPass(observer_lat, observer_lon, min_elevation)
+
+
+def SharedContextQuery():
+    for observer_lat, observer_lon, min_elevation in OBSERVERS:
+        NextPassage.NextPass(observer_lat, observer_lon, min_elevation)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Per-query latency of NextPassage with and without the shared skyfield context")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tle_line1, tle_line2 = NextPassage.GetTLE(60239)
+    ts = load.timescale()
+    Report("load.timescale()", *Measure(load.timescale, args.repeat))
+    Report("EarthSatellite(tle)", *Measure(
+        lambda: EarthSatellite(tle_line1, tle_line2, 'Satellite', ts), args.repeat))
+    Report("Topos(lat, lon)", *Measure(
+        lambda: Topos(latitude_degrees=48.8566, longitude_degrees=2.3522), args.repeat))
+
+    # The shared case runs on warm pass tables, the per-call case rebuilds them
+    SharedContextQuery()
+    n_queries = len(OBSERVERS)
+    before_median, before_max = Measure(FreshContextQuery, args.repeat)
+    after_median, after_max = Measure(SharedContextQuery, args.repeat)
+    Report("NextPass, context per call (before)",
+           before_median / n_queries, before_max / n_queries)
+    Report("NextPass, shared context (after)",
+           after_median / n_queries, after_max / n_queries)
+    print(f"speedup: {before_median / after_median:.1f}x")
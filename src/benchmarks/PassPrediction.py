@@ -0,0 +1,50 @@
+import argparse
+import os
+import time
+import numpy as np
+
+# Batches are split across the shared compute pool, one process per core
+# unless configured otherwise
+os.environ.setdefault("PARISAT_COMPUTE_PROCESSES", str(os.cpu_count() or 1))
+import modules.ComputePool as ComputePool
+import modules.NextPassage as NextPassage
+import modules.PassPrediction as PassPrediction
+
+
+def Observers(n_observers, seed=0):
+    rng = np.random.default_rng(seed)
+    lats = np.degrees(np.arcsin(rng.uniform(-0.9, 0.9, n_observers)))
+    lons = rng.uniform(-180.0, 180.0, n_observers)
+    return lats, lons
+
+
+def Timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Throughput of the batch pass prediction against the per-site skyfield search")
+    parser.add_argument("--observers", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--processes", type=int, nargs="+", default=[0, ComputePool.MAX_PROCESSES],
+                        help="chunks a batch is split into, at most PARISAT_COMPUTE_PROCESSES")
+    parser.add_argument("--baseline", type=int, default=10,
+                        help="observers searched one by one with find_events")
+    args = parser.parse_args()
+
+    # TLE download, satellite parsing and process start-up are left out of the timings
+    PassPrediction.PredictPasses(*Observers(PassPrediction.MIN_OBSERVERS_PER_PROCESS * 2),
+                                 processes=max(args.processes))
+
+    lats, lons = Observers(args.baseline, seed=1)
+    seconds = Timed(lambda: [NextPassage.NextPass(lat, lon, 0.0) for lat, lon in zip(lats, lons)])
+    print(f"find_events per site  {args.baseline:>6} observers  "
+          f"{seconds:8.3f} s  {seconds / args.baseline * 1000:8.3f} ms/observer")
+    for processes in args.processes:
+        for n_observers in args.observers:
+            lats, lons = Observers(n_observers, seed=2)
+            seconds = Timed(PassPrediction.PredictPasses, lats, lons, processes=processes)
+            print(f"batch, {processes} processes  {n_observers:>6} observers  "
+                  f"{seconds:8.3f} s  {seconds / n_observers * 1000:8.3f} ms/observer")
@@ -0,0 +1,60 @@
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_PACKAGES = ["astropy", "poliastro", "numba", "llvmlite", "skyfield", "sgp4",
+                  "pandas", "plotly", "numpy", "requests"]
+# Modules the first request of each page imports on top of the app shell
+PAGES = {
+    "shell": [],
+    "about": [],
+    "live": ["modules.LiveTracking", "modules.Catalog", "modules.NextPassage"],
+    "flight": ["modules.FlightArtifact"],
+    "scientific": ["modules.ScientificAnalysis"],
+}
+
+
+def Profile(page):
+    # One fresh interpreter per page, as a new worker would be
+    imports = "; ".join(["import app"] + [f"import {module}" for module in PAGES[page]])
+    code = (f"{imports}; import resource, sys; "
+            f"print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss); "
+            f"print(','.join(sorted(m for m in sys.modules if '.' not in m)))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=SRC_DIR,
+                            capture_output=True, text=True, check=True)
+    self_us = defaultdict(int)
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        self_us[package] += int(self_time)
+        total_us += int(self_time)
+    max_rss_kb, loaded = result.stdout.splitlines()[-2:]
+    return total_us, self_us, int(max_rss_kb), set(loaded.split(","))
+
+
+def Report(page, top):
+    total_us, self_us, max_rss_kb, loaded = Profile(page)
+    print(f"{page}: {total_us / 1000:.0f} ms of imports, peak RSS {max_rss_kb / 1024:.0f} MB")
+    heavy = [package for package in HEAVY_PACKAGES if package in loaded]
+    print(f"  heavy packages loaded: {', '.join(heavy) if heavy else 'none'}")
+    for package, us in sorted(self_us.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<30} {us / 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Import time and memory of a worker, for the shell and each page's first use")
+    parser.add_argument("pages", nargs="*", help=f"any of {', '.join(PAGES)}, all by default")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    unknown = set(args.pages) - set(PAGES)
+    if unknown:
+        parser.error(f"unknown pages: {', '.join(sorted(unknown))}")
+    for page in args.pages or PAGES:
+        Report(page, args.top)
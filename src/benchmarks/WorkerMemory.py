@@ -0,0 +1,85 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import requests
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["/", "/flight-trajectory", "/scientific-analysis", "/about"]
+
+
+def Children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def Memory(pid):
+    # Proportional set size splits shared pages between the processes mapping
+    # them, so it adds up to the real footprint
+    memory = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            fields = line.split()
+            if fields[0] in ("Rss:", "Pss:"):
+                memory[fields[0][:-1]] = int(fields[1])
+    return memory
+
+
+def RenderPages(port, rounds):
+    # Dash renders pages through its callback endpoint, hit every worker a few times
+    for _ in range(rounds):
+        for page in PAGES:
+            response = requests.post(f"http://127.0.0.1:{port}/_dash-update-component", timeout=60, json={
+                "output": "..page-content.children...live-tracking-input.children..",
+                "outputs": [{"id": "page-content", "property": "children"},
+                            {"id": "live-tracking-input", "property": "children"}],
+                "inputs": [{"id": "url", "property": "pathname", "value": page}],
+                "changedPropIds": ["url.pathname"]})
+            response.raise_for_status()
+
+
+def Measure(workers, preload, port, rounds):
+    env = dict(os.environ, PARISAT_PRELOAD="1" if preload else "0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(SRC_DIR, "gunicorn.conf.py"),
+         "-w", str(workers), "-b", f"127.0.0.1:{port}", "app:server"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 120
+        while True:
+            try:
+                requests.get(f"http://127.0.0.1:{port}/", timeout=5)
+                break
+            except requests.ConnectionError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.5)
+        RenderPages(port, rounds * workers)
+        pids = [server.pid] + Children(server.pid)
+        totals = {"Rss": 0, "Pss": 0}
+        for pid in pids:
+            for key, value in Memory(pid).items():
+                totals[key] += value
+        return len(pids) - 1, totals
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Total memory of gunicorn with and without preload, after every page was served")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rounds", type=int, default=2)
+    args = parser.parse_args()
+    for preload in (False, True):
+        for workers in args.workers:
+            n_workers, totals = Measure(workers, preload, args.port, args.rounds)
+            print(f"preload={'on ' if preload else 'off'} workers={n_workers}: "
+                  f"PSS {totals['Pss'] / 1024:7.1f} MB, RSS {totals['Rss'] / 1024:7.1f} MB")
@@ -0,0 +1,33 @@
+import os
+
+# Render starts gunicorn from the repository root
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+# With PARISAT_PRELOAD=0 every worker imports the app and builds its own state
+preload_app = os.environ.get("PARISAT_PRELOAD", "1") == "1"
+
+# "gthread" serves every request on a thread of the worker, so a TLE fetch,
+# a next-pass poll or an event stream only holds one thread. "sync" is the
+# one request per worker mode of gunicorn's default
+worker_class = os.environ.get("PARISAT_WORKER_CLASS", "gthread")
+if worker_class == "gthread":
+    threads = int(os.environ.get("PARISAT_THREADS", 16))
+    # Longer than the live tick, or idle connections are closed just as a
+    # viewer reuses them
+    keepalive = 5
+    # CPU-bound searches would hold the GIL against the other threads, they
+    # go to a bounded process pool instead (modules.ComputePool)
+    os.environ.setdefault("PARISAT_COMPUTE_PROCESSES", "2")
+    # Each live event stream holds a thread for as long as its viewer stays,
+    # half of them are left to the other requests
+    os.environ.setdefault("PARISAT_PUSH_SUBSCRIBERS", str(threads // 2))
+elif worker_class == "sync":
+    # A stream would hold the whole worker until its timeout, push viewers poll
+    os.environ.setdefault("PARISAT_PUSH_SUBSCRIBERS", "0")
+
+
+def when_ready(server):
+    # Runs in the master once the app is loaded and before the first fork
+    if preload_app:
+        import modules.Preload as Preload
+        Preload.Warm()
@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_THREADS = int(os.environ.get("PARISAT_TASK_THREADS", 2))
+RESULT_TTL = float(os.environ.get("PARISAT_TASK_RESULT_TTL", 60))
+
+_executor = None
+_tasks = {}
+_lock = threading.Lock()
+
+
+def _Executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=MAX_THREADS, thread_name_prefix="parisat-task")
+    return _executor
+
+
+def _Expire(now):
+    expired = [key for key, task in _tasks.items()
+               if task["future"].done() and now - task["submitted"] > RESULT_TTL]
+    for key in expired:
+        del _tasks[key]
+
+
+def Submit(key, fn, *args):
+    # Identical queries share one future, each caller holds a reference until Release
+    now = time.time()
+    with _lock:
+        _Expire(now)
+        task = _tasks.get(key)
+        if task is None or task["future"].cancelled():
+            task = _tasks[key] = {
+                "future": _Executor().submit(fn, *args),
+                "submitted": now,
+                "waiters": 0,
+            }
+        task["waiters"] += 1
+        return task["future"]
+
+
+def Get(key):
+    with _lock:
+        task = _tasks.get(key)
+        return task["future"] if task else None
+
+
+def Release(key):
+    # Superseded queries nobody waits for are cancelled if they have not started yet
+    with _lock:
+        task = _tasks.get(key)
+        if task is None:
+            return
+        task["waiters"] -= 1
+        # A task already running stays registered so that an identical query
+        # joins it instead of starting a second computation
+        if task["waiters"] <= 0 and task["future"].cancel():
+            del _tasks[key]
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from sgp4.api import Satrec, SatrecArray
+import modules.Ephemeris as Ephemeris
+import modules.Geodetic as Geodetic
+import modules.TLEProvider as TLEProvider
+import numpy as np
+import os
+import threading
+import time
+
+PRIMARY_NORAD_ID = 60239
+STEP_SECONDS = float(os.environ.get("PARISAT_CATALOG_STEP", 10))
+MAX_CATALOGS = 32
+
+
+def _Satellites(spec):
+    # "norad_id:name,norad_id:name", the other VA262 payloads can be added here
+    satellites = OrderedDict()
+    for item in spec.split(","):
+        norad_id, _, name = item.partition(":")
+        if norad_id.strip():
+            satellites[int(norad_id)] = name.strip() or norad_id.strip()
+    return satellites
+
+
+SATELLITES = _Satellites(os.environ.get(
+    "PARISAT_CATALOG", "60239:PariSat,25544:ISS"))
+
+_catalogs = OrderedDict()
+_lock = threading.Lock()
+
+
+class Catalog:
+    # Every satellite of a selection in one SatrecArray, so a tick is a single
+    # vectorized propagation whatever the number of satellites
+    def __init__(self, tles):
+        self.norad_ids = [int(tle['tle1'][2:7]) for tle in tles]
+        self.names = [SATELLITES.get(norad_id, tle.get('tle0', str(norad_id)))
+                      for norad_id, tle in zip(self.norad_ids, tles)]
+        self.satellites = SatrecArray(
+            [Satrec.twoline2rv(tle['tle1'], tle['tle2']) for tle in tles])
+
+    def Propagate(self, times):
+        # Geodetic positions, satellites x times, NaN where SGP4 fails
+        jd, fr = Ephemeris.JulianDate(np.atleast_1d(times))
+        errors, r, _ = self.satellites.sgp4(jd, fr)
+        lat, lon, alt = Geodetic.TEMEToGeodetic(r, jd, fr)
+        failed = errors != 0
+        for values in (lat, lon, alt):
+            values[failed] = np.nan
+        return lat, lon, alt
+
+    def Positions(self, t=None):
+        t = time.time() if t is None else t
+        lat, lon, alt = self.Propagate(t)
+        return lat[:, 0], lon[:, 0], alt[:, 0]
+
+    def Window(self, t0, duration, step=STEP_SECONDS):
+        times = np.arange(np.floor(t0 / step) * step, t0 + duration + step, step)
+        lat, lon, alt = self.Propagate(times)
+        # Unwrapped longitudes keep interpolation continuous across the antimeridian
+        return times, lat, np.degrees(np.unwrap(np.radians(lon), axis=1)), alt
+
+
+def ForSatellites(norad_ids):
+    tles = [tle for tle in (TLEProvider.GetTLE(norad_id) for norad_id in norad_ids) if tle]
+    if not tles:
+        return None
+    key = tuple((tle['tle1'], tle['tle2']) for tle in tles)
+    with _lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = Catalog(tles)
+            while len(_catalogs) > MAX_CATALOGS:
+                _catalogs.popitem(last=False)
+        else:
+            _catalogs.move_to_end(key)
+    return catalog
+
+
+if __name__ == '__main__':
+    # Per-tick cost against the number of satellites, the same TLE repeated
+    tle = TLEProvider.GetTLE(PRIMARY_NORAD_ID)
+    for n_satellites in (1, 10, 100, 1000, 10000):
+        catalog = Catalog([tle] * n_satellites)
+        start = time.perf_counter()
+        for _ in range(100):
+            catalog.Positions()
+        elapsed = (time.perf_counter() - start) * 10.0
+        print(f"{n_satellites:6d} satellites: {elapsed:8.3f} ms per tick, "
+              f"{elapsed * 1000.0 / n_satellites:8.3f} µs per satellite")
@@ -0,0 +1,48 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Processes for the CPU-bound work of threaded workers, 0 runs it in the
+# calling thread as sync workers do
+MAX_PROCESSES = int(os.environ.get("PARISAT_COMPUTE_PROCESSES", 0))
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _Pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                # Forking a threaded worker could copy locks held by other
+                # threads, the forkserver starts from a clean process
+                _pool = ProcessPoolExecutor(
+                    max_workers=MAX_PROCESSES, mp_context=multiprocessing.get_context("forkserver"))
+    return _pool
+
+
+def Run(fn, *args):
+    # Only the calling thread waits, without the GIL, the worker's other
+    # threads keep serving
+    if MAX_PROCESSES <= 0:
+        return fn(*args)
+    return _Pool().submit(fn, *args).result()
+
+
+def Map(fn, calls):
+    # Every call submitted at once, the results in the order of the calls
+    if MAX_PROCESSES <= 0:
+        return [fn(*args) for args in calls]
+    futures = [_Pool().submit(fn, *args) for args in calls]
+    return [future.result() for future in futures]
+
+
+def _AfterFork():
+    global _pool, _lock
+    _pool = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_AfterFork)
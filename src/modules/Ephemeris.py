@@ -0,0 +1,111 @@
+from sgp4.api import Satrec
+import modules.Geodetic as Geodetic
+import numpy as np
+import os
+import threading
+import time
+from math import pi
+
+STEP_SECONDS = float(os.environ.get("PARISAT_EPHEMERIS_STEP", 10))
+PERIODS = float(os.environ.get("PARISAT_EPHEMERIS_PERIODS", 3))
+UNIX_EPOCH_JD = 2440587.5
+
+_ephemerides = {}
+_lock = threading.Lock()
+
+
+def JulianDate(unix_times):
+    days = np.asarray(unix_times, dtype=float) / 86400.0
+    whole_days = np.floor(days)
+    return whole_days + UNIX_EPOCH_JD, days - whole_days
+
+
+class Ephemeris:
+    def __init__(self, tle, step=STEP_SECONDS, periods=PERIODS):
+        self.tle = tle
+        self.satellite = Satrec.twoline2rv(tle['tle1'], tle['tle2'])
+        self.period = 2 * pi / self.satellite.no_kozai * 60.0
+        self.step = step
+        self.horizon = periods * self.period
+        self.table = None
+        self._lock = threading.Lock()
+
+    def _Compute(self, start, end):
+        times = np.arange(start, end + self.step / 2, self.step)
+        jd, fr = JulianDate(times)
+        errors, r, _ = self.satellite.sgp4_array(jd, fr)
+        valid = errors == 0
+        lat, lon, alt = Geodetic.TEMEToGeodetic(r[valid], jd[valid], fr[valid])
+        return times[valid], lat, lon, alt
+
+    def _Extend(self, now):
+        table = self.table
+        start = np.floor((now - self.period) / self.step) * self.step
+        end = now + self.horizon
+        if table is None or table[0][0] > now:
+            times, lat, lon, alt = self._Compute(start, end)
+        else:
+            times, lat, lon, alt = self._Compute(
+                table[0][-1] + self.step, end)
+            keep = table[0] >= start
+            times = np.concatenate([table[0][keep], times])
+            lat = np.concatenate([table[1][keep], lat])
+            lon = np.concatenate([table[2][keep], lon])
+            alt = np.concatenate([table[3][keep], alt])
+        # Unwrapped longitudes keep interpolation continuous across the antimeridian
+        lon = np.degrees(np.unwrap(np.radians(lon)))
+        self.table = (times, lat, lon, alt)
+
+    def Table(self, now=None):
+        now = time.time() if now is None else now
+        table = self.table
+        if table is None or table[0][0] > now or table[0][-1] - now < self.period:
+            with self._lock:
+                table = self.table
+                if table is None or table[0][0] > now or table[0][-1] - now < self.period:
+                    self._Extend(now)
+                table = self.table
+        return table
+
+    def Position(self, t=None):
+        t = time.time() if t is None else t
+        times, lat, lon, alt = self.Table(t)
+        position_lon = np.interp(t, times, lon)
+        return (float(np.interp(t, times, lat)),
+                float((position_lon + 180.0) % 360.0 - 180.0),
+                float(np.interp(t, times, alt)))
+
+    def Window(self, t0, duration):
+        times, lat, lon, alt = self.Table(t0)
+        i0 = max(np.searchsorted(times, t0, side='right') - 1, 0)
+        i1 = np.searchsorted(times, t0 + duration) + 1
+        return times[i0:i1], lat[i0:i1], lon[i0:i1], alt[i0:i1]
+
+    def Track(self, t0, duration):
+        times, lat, lon, _ = self.Table(t0)
+        i0 = np.searchsorted(times, t0)
+        i1 = np.searchsorted(times, t0 + duration, side='right')
+        return lat[i0:i1], (lon[i0:i1] + 180.0) % 360.0 - 180.0
+
+
+def ForTLE(tle):
+    key = tle['tle1'][2:7]
+    with _lock:
+        ephemeris = _ephemerides.get(key)
+        if ephemeris is None or ephemeris.tle['tle1'] != tle['tle1'] or ephemeris.tle['tle2'] != tle['tle2']:
+            ephemeris = _ephemerides[key] = Ephemeris(tle)
+    return ephemeris
+
+
+if __name__ == '__main__':
+    import modules.TLEProvider as TLEProvider
+    ephemeris = ForTLE(TLEProvider.GetTLE(60239))
+    start = time.perf_counter()
+    ephemeris.Table()
+    print(f"Table built in {time.perf_counter() - start:.3f} s, "
+          f"{len(ephemeris.table[0])} samples")
+    start = time.perf_counter()
+    for _ in range(1000):
+        ephemeris.Position()
+    print(f"Position lookup: {(time.perf_counter() - start) * 1000:.3f} µs")
+    print(ephemeris.Position())
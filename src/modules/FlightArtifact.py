@@ -0,0 +1,36 @@
+import json
+import os
+import threading
+
+ARTIFACT_VERSION = 1
+ARTIFACT_PATH = os.environ.get("PARISAT_FLIGHT_ARTIFACT", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "FlightTrajectory.json"))
+
+_artifact = None
+_lock = threading.Lock()
+
+
+def Read(path=ARTIFACT_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            artifact = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if artifact.get("version") != ARTIFACT_VERSION:
+        return None
+    return artifact
+
+
+def Load():
+    global _artifact
+    if _artifact is None:
+        with _lock:
+            if _artifact is None:
+                artifact = Read()
+                if artifact is None:
+                    # Missing or outdated artifact: render it once, this needs the build dependencies
+                    import modules.FlightTrajectory as FlightTrajectory
+                    artifact = FlightTrajectory.BuildArtifact()
+                _artifact = artifact
+    return _artifact
+
@@ -1,16 +1,21 @@
 from astropy import units as u
-from poliastro.earth import EarthSatellite
 from poliastro.earth.plotting import GroundtrackPlotter
 from sgp4.api import Satrec
 from poliastro.bodies import Earth
 from poliastro.twobody import Orbit
+from poliastro.twobody.sampling import EpochsArray
 from astropy.time import Time
 from poliastro.util import time_range
-from astropy.coordinates import SphericalRepresentation
 import numpy as np
 import plotly.graph_objects as go
-from datetime import timedelta
-from math import sqrt, degrees, radians, cos, sin
+import argparse
+import json
+import os
+import modules.FlightArtifact as FlightArtifact
+import modules.Geodetic as Geodetic
+import modules.Footprint as Footprint
+
+INITIALIZATION_TIME = 3966
 
 
 def GetTLE():
@@ -32,83 +37,70 @@ def OrbitFromTLE(tle):
     return orbit
 
 
-def CalculateVisibilityRadius(altitude_km):
-    R_earth_km = 6371.0
-    visibility_radius_km = sqrt((R_earth_km + altitude_km)**2 - R_earth_km**2)
-    return visibility_radius_km
-
-
-def GenerateCirclePoints(lat, lon, radius_km, num_points=100):
-    circle_lats = []
-    circle_lons = []
-    for i in range(num_points):
-        angle = radians(float(i) / num_points * 360)
-        dlat = radius_km / 6371.0 * cos(angle)
-        dlon = radius_km / 6371.0 * sin(angle) / cos(radians(lat))
-        circle_lats.append(lat + degrees(dlat))
-        circle_lons.append(lon + degrees(dlon))
-    return circle_lats, circle_lons
+def LatLonAlt(orb: Orbit):
+    epoch = orb.epoch.utc
+    return Geodetic.TEMEToGeodetic(orb.r.to_value(u.km), epoch.jd1, epoch.jd2)
 
 
-def LatLon(orb: Orbit, gp):
-    raw_pos, raw_epoch = orb.rv()[0], orb.epoch
-    itrs_pos = gp._from_raw_to_ITRS(raw_pos, raw_epoch)
-    itrs_latlon_pos = itrs_pos.represent_as(SphericalRepresentation)
+def GroundTrack(orb: Orbit, t_span):
+    ephem = orb.to_ephem(EpochsArray(t_span))
+    epochs = ephem.epochs.utc
+    return Geodetic.TEMEToGeodetic(ephem.rv()[0].to_value(u.km), epochs.jd1, epochs.jd2)
 
-    lat = itrs_latlon_pos.lat.to_value(u.deg)
-    lon = itrs_latlon_pos.lon.to_value(u.deg)
-    return lat, lon
 
+def PropagateEvents(orb: Orbit, mission_times):
+    # Every event epoch is propagated in a single call, mission times are seconds after liftoff
+    offsets = np.atleast_1d(np.asarray(mission_times, dtype=float)) - INITIALIZATION_TIME
+    return GroundTrack(orb, orb.epoch + offsets * u.s)
 
-def AddPhoto(parisat, gp, i, delta):
-    prs_prop = parisat.propagate(parisat.epoch + timedelta(seconds=delta-3966))
-    lat_photo, lon_photo = LatLon(prs_prop, gp)
-    PHOTO = [lat_photo, lon_photo] * u.deg
 
-    gp.add_trace(
-        go.Scattergeo(
-            lat=PHOTO[0],
-            lon=PHOTO[-1],
-            name=f"Photo {i}",
-            marker={
-                "color": "#ECEFF1",
-                "size": 15,
-                "symbol": "star-diamond",
-            },
-            hoverinfo='none',
-            customdata=[f"Photo n°{i}"],
+def AddVisibilities(gp, lats, lons, altitudes, names):
+    indices = []
+    for name, lat, lon, altitude_km in zip(names, lats, lons, altitudes):
+        circle_lats, circle_lons = Footprint.FootprintPolygon(
+            lat, lon, altitude_km)
+        gp.add_trace(
+            go.Scattergeo(
+                lon=circle_lons,
+                lat=circle_lats,
+                name=name,
+                mode='lines',
+                line=dict(width=0, color='#ECEFF1'),
+                fill='toself',
+                fillcolor='rgba(236, 239, 241, 0.5)',
+                opacity=0.5,
+                hoverinfo='skip',
+                visible=False
+            )
         )
-    )
-
+        indices.append(len(gp.fig.data) - 1)
+    return indices
 
-def AddVisibility(parisat, gp, i, delta):
-    prs_prop = parisat.propagate(parisat.epoch + timedelta(seconds=delta-3966))
-    lat_photo, lon_photo = LatLon(prs_prop, gp)
-    altitude_km = np.linalg.norm(prs_prop.r.to(u.km).value) - 6371.0
-    visibility_radius_km = CalculateVisibilityRadius(altitude_km)
-    circle_lats, circle_lons = GenerateCirclePoints(
-        lat_photo, lon_photo, visibility_radius_km)
 
-    gp.add_trace(
-        go.Scattergeo(
-            lon=circle_lons,
-            lat=circle_lats,
-            name=f"Visibility {i}",
-            mode='lines',
-            line=dict(width=0, color='#ECEFF1'),
-            fill='toself',
-            fillcolor='rgba(236, 239, 241, 0.5)',
-            opacity=0.5,
-            hoverinfo='skip',
-            visible=False
+def AddPhotos(gp, lats, lons, numbers):
+    indices = []
+    for number, lat, lon in zip(numbers, lats, lons):
+        gp.add_trace(
+            go.Scattergeo(
+                lat=[lat],
+                lon=[lon],
+                name=f"Photo {number}",
+                marker={
+                    "color": "#ECEFF1",
+                    "size": 15,
+                    "symbol": "star-diamond",
+                },
+                hoverinfo='none',
+                customdata=[f"Photo n°{number}"],
+            )
         )
-    )
+        indices.append(len(gp.fig.data) - 1)
+    return indices
 
 
 def ShowOrbit():
     tle = GetTLE()
     parisat = OrbitFromTLE(tle)
-    prs_spacecraft = EarthSatellite(parisat, None)
     t_span = time_range(
         parisat.epoch, end=parisat.epoch + (10874.28 - 3955.92) * u.s
     )
@@ -143,11 +135,9 @@ def ShowOrbit():
         lonaxis_gridwidth=0.5
     )
 
-    altitude_km = np.linalg.norm(parisat.r.to(u.km).value) - 6371.0
-    visibility_radius_km = CalculateVisibilityRadius(altitude_km)
-    lat, lon = LatLon(parisat, gp)
-    circle_lats, circle_lons = GenerateCirclePoints(
-        lat, lon, visibility_radius_km)
+    lat, lon, altitude_km = LatLonAlt(parisat)
+    circle_lats, circle_lons = Footprint.FootprintPolygon(
+        lat, lon, altitude_km)
 
     gp.add_trace(
         go.Scattergeo(
@@ -196,37 +186,77 @@ def ShowOrbit():
         )
     )
 
-    gp.plot(
-        prs_spacecraft,
-        t_span,
-        label="Trajectory",
-        color="#FFB703",
-        line_style={"width": 2},
-        marker={
-            "size": 15,
-            "symbol": "circle"
-        }
+    track_lats, track_lons, _ = GroundTrack(parisat, t_span)
+    gp.add_trace(
+        go.Scattergeo(
+            lat=track_lats,
+            lon=track_lons,
+            mode="lines",
+            name="Trajectory",
+            line={"width": 2, "color": "#FFB703"},
+            hoverinfo='skip',
+        )
+    )
+    gp.add_trace(
+        go.Scattergeo(
+            lat=[lat],
+            lon=[lon],
+            name="Trajectory",
+            marker={
+                "size": 15,
+                "symbol": "circle",
+                "color": "#FFB703"
+            },
+            showlegend=False,
+            hovertemplate="PariSat Initialization • T0+3966s<extra></extra>",
+        )
     )
-    for data in gp.fig.data:
-        if data.name == "Trajectory":
-            if data.marker['symbol'] == 'circle':
-                data.hovertemplate = "PariSat Initialization • T0+3966s<extra></extra>"
-            else:
-                data.hoverinfo = 'skip'
 
     photo_deltas = [4166, 4297, 4565, 4925, 4963, 5006, 5768, 6118, 6522, 6560]
-    visibility_traces = []
-    photo_traces = []
-    for i in range(len(photo_deltas)):
-        AddVisibility(parisat, gp, i+1, photo_deltas[i])
-        visibility_traces.append(len(gp.fig.data) - 1)
-    for i in range(len(photo_deltas)):
-        AddPhoto(parisat, gp, i+1, photo_deltas[i])
-        photo_traces.append(len(gp.fig.data) - 1)
+    photo_numbers = range(1, len(photo_deltas) + 1)
+    photo_lats, photo_lons, photo_altitudes = PropagateEvents(parisat, photo_deltas)
+    visibility_traces = AddVisibilities(
+        gp, photo_lats, photo_lons, photo_altitudes, [f"Visibility {i}" for i in photo_numbers])
+    photo_traces = AddPhotos(gp, photo_lats, photo_lons, photo_numbers)
 
     return gp.fig, visibility_traces, photo_traces
 
 
+def Render():
+    fig, visibility_traces, photo_traces = ShowOrbit()
+    photos = [
+        {"number": i + 1, "lat": fig.data[idx].lat[0], "lon": fig.data[idx].lon[0]}
+        for i, idx in enumerate(photo_traces)
+    ]
+    return {
+        "version": FlightArtifact.ARTIFACT_VERSION,
+        "tle": GetTLE(),
+        "figure": json.loads(fig.to_json()),
+        "visibility_traces": visibility_traces,
+        "photo_traces": photo_traces,
+        "photos": photos,
+    }
+
+
+def BuildArtifact(path=FlightArtifact.ARTIFACT_PATH):
+    artifact = Render()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return artifact
+
+
 if __name__ == '__main__':
-    fig, _, _ = ShowOrbit()
-    fig.show()
+    parser = argparse.ArgumentParser(
+        description="Render the PariSat flight trajectory")
+    parser.add_argument("command", nargs="?", choices=["build", "show"], default="show")
+    parser.add_argument("--output", default=FlightArtifact.ARTIFACT_PATH)
+    args = parser.parse_args()
+    if args.command == "build":
+        BuildArtifact(args.output)
+        print(f"Flight trajectory artifact written to {args.output}")
+    else:
+        fig, _, _ = ShowOrbit()
+        fig.show()
@@ -0,0 +1,109 @@
+import numpy as np
+from functools import lru_cache
+
+R_EARTH_KM = 6371.0
+LAT_QUANTUM = 0.1
+ALTITUDE_QUANTUM_KM = 1.0
+
+
+def CoverageAngle(altitude_km, min_elevation=0.0):
+    # Earth central angle between the sub-satellite point and the edge of the
+    # area where the satellite is seen above min_elevation
+    elevation = np.radians(min_elevation)
+    return np.degrees(np.arccos(R_EARTH_KM * np.cos(elevation) / (R_EARTH_KM + altitude_km)) - elevation)
+
+
+@lru_cache(maxsize=4096)
+def _Shape(lat_q, altitude_q, min_elevation, num_points):
+    lat0 = np.radians(lat_q)
+    angle = np.radians(CoverageAngle(altitude_q, min_elevation))
+    # Clockwise bearings, the ring orientation plotly expects for filled geo polygons
+    bearing = np.linspace(0.0, 2.0 * np.pi, num_points, endpoint=False)
+    lat = np.arcsin(np.sin(lat0) * np.cos(angle)
+                    + np.cos(lat0) * np.sin(angle) * np.cos(bearing))
+    dlon = np.arctan2(np.sin(bearing) * np.sin(angle) * np.cos(lat0),
+                      np.cos(angle) - np.sin(lat0) * np.sin(lat))
+    lat, dlon = np.degrees(lat), np.degrees(dlon)
+    lat.flags.writeable = False
+    dlon.flags.writeable = False
+    return lat, dlon
+
+
+def _Clip(lons, lats, limit, keep_below):
+    # Sutherland-Hodgman clipping of a closed ring against the meridian lon=limit
+    next_lons, next_lats = np.roll(lons, -1), np.roll(lats, -1)
+    inside = lons <= limit if keep_below else lons >= limit
+    next_inside = np.roll(inside, -1)
+    crossing = inside != next_inside
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f = (limit - lons) / (next_lons - lons)
+    cross_lats = lats + f * (next_lats - lats)
+    out_lons = np.stack([lons, np.full_like(lons, limit)], axis=1).ravel()
+    out_lats = np.stack([lats, cross_lats], axis=1).ravel()
+    keep = np.stack([inside, crossing], axis=1).ravel()
+    return out_lons[keep], out_lats[keep]
+
+
+def _Join(pieces):
+    lats, lons = [], []
+    for piece_lons, piece_lats in pieces:
+        if len(piece_lons) < 3:
+            continue
+        if lats:
+            lats.append(None)
+            lons.append(None)
+        lats.extend(np.round(piece_lats, 4).tolist())
+        lons.extend(np.round(piece_lons, 4).tolist())
+    return lats, lons
+
+
+def FootprintPolygon(lat, lon, altitude_km, min_elevation=0.0, num_points=100):
+    lat_q = round(lat / LAT_QUANTUM) * LAT_QUANTUM
+    altitude_q = round(altitude_km / ALTITUDE_QUANTUM_KM) * ALTITUDE_QUANTUM_KM
+    shape_lats, shape_dlons = _Shape(lat_q, altitude_q, float(min_elevation), num_points)
+    lats = np.clip(shape_lats + (lat - lat_q), -90.0, 90.0)
+    lon = (lon + 180.0) % 360.0 - 180.0
+    angle = CoverageAngle(altitude_q, min_elevation)
+
+    if abs(lat_q) + angle >= 90.0:
+        # The footprint contains a pole: close the ring along the map edges through the pole
+        lons = (lon + shape_dlons + 180.0) % 360.0 - 180.0
+        order = np.argsort(lons)
+        lons, lats = lons[order], lats[order]
+        edge_lats = np.interp([-180.0, 180.0], np.concatenate([lons - 360.0, lons, lons + 360.0]),
+                              np.concatenate([lats, lats, lats]))
+        lons = np.concatenate([[-180.0], lons, [180.0]])
+        lats = np.concatenate([[edge_lats[0]], lats, [edge_lats[1]]])
+        pole = 90.0 if lat_q > 0 else -90.0
+        if pole > 0:
+            lons, lats = lons[::-1], lats[::-1]
+        lons = np.concatenate([lons, [lons[-1], lons[0]]])
+        lats = np.concatenate([lats, [pole, pole]])
+        return _Join([(lons, lats)])
+
+    lons = lon + shape_dlons
+    if lons.max() > 180.0:
+        pieces = [_Clip(lons, lats, 180.0, True)]
+        east_lons, east_lats = _Clip(lons, lats, 180.0, False)
+        pieces.append((east_lons - 360.0, east_lats))
+    elif lons.min() < -180.0:
+        pieces = [_Clip(lons, lats, -180.0, False)]
+        west_lons, west_lats = _Clip(lons, lats, -180.0, True)
+        pieces.append((west_lons + 360.0, west_lats))
+    else:
+        pieces = [(lons, lats)]
+    return _Join(pieces)
+
+
+if __name__ == '__main__':
+    import time
+    FootprintPolygon(48.8, 2.3, 585.0)
+    start = time.perf_counter()
+    for i in range(10000):
+        FootprintPolygon(48.8 + (i % 7) * 0.01, 2.3, 585.0)
+    print(f"Cached footprint: {(time.perf_counter() - start) * 100:.1f} µs")
+    for lat, lon in [(0.0, 0.0), (10.0, 178.0), (-20.0, -179.0), (80.0, 30.0), (-85.0, 120.0)]:
+        lats, lons = FootprintPolygon(lat, lon, 585.0)
+        print(lat, lon, f"{lats.count(None) + 1} piece(s)",
+              f"lat [{min(x for x in lats if x is not None):.1f}, {max(x for x in lats if x is not None):.1f}]",
+              f"lon [{min(x for x in lons if x is not None):.1f}, {max(x for x in lons if x is not None):.1f}]")
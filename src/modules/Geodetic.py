@@ -0,0 +1,96 @@
+import numpy as np
+
+# WGS84 ellipsoid
+A_KM = 6378.137
+F = 1.0 / 298.257223563
+E2 = F * (2.0 - F)
+J2000_JD = 2451545.0
+
+
+def GMST(jd, fr=0.0):
+    # IAU 1982 sidereal time, the convention the TEME frame of SGP4 is defined in
+    t_ut1 = ((np.asarray(jd, dtype=float) - J2000_JD) + np.asarray(fr, dtype=float)) / 36525.0
+    seconds = (-6.2e-6 * t_ut1 ** 3 + 0.093104 * t_ut1 ** 2
+               + (876600.0 * 3600.0 + 8640184.812866) * t_ut1 + 67310.54841)
+    return np.radians(seconds / 240.0) % (2.0 * np.pi)
+
+
+def TEMEToECEF(r_teme, jd, fr=0.0):
+    # Polar motion is neglected, it moves the ground point by less than 20 m
+    r_teme = np.asarray(r_teme, dtype=float)
+    theta = GMST(jd, fr)
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+    x = cos_theta * r_teme[..., 0] + sin_theta * r_teme[..., 1]
+    y = -sin_theta * r_teme[..., 0] + cos_theta * r_teme[..., 1]
+    return np.stack([x, y, r_teme[..., 2]], axis=-1)
+
+
+def ECEFToGeodetic(r_ecef, iterations=4):
+    r_ecef = np.asarray(r_ecef, dtype=float)
+    x, y, z = r_ecef[..., 0], r_ecef[..., 1], r_ecef[..., 2]
+    p = np.hypot(x, y)
+    lon = np.arctan2(y, x)
+    lat = np.arctan2(z, p * (1.0 - E2))
+    for _ in range(iterations):
+        sin_lat = np.sin(lat)
+        n = A_KM / np.sqrt(1.0 - E2 * sin_lat ** 2)
+        lat = np.arctan2(z + E2 * n * sin_lat, p)
+    sin_lat = np.sin(lat)
+    alt = p * np.cos(lat) + z * sin_lat - A_KM * np.sqrt(1.0 - E2 * sin_lat ** 2)
+    return np.degrees(lat), np.degrees(lon), alt
+
+
+def GeodeticToECEF(lat, lon, alt=0.0):
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    alt = np.asarray(alt, dtype=float)
+    sin_lat = np.sin(lat)
+    n = A_KM / np.sqrt(1.0 - E2 * sin_lat ** 2)
+    x = (n + alt) * np.cos(lat) * np.cos(lon)
+    y = (n + alt) * np.cos(lat) * np.sin(lon)
+    z = (n * (1.0 - E2) + alt) * sin_lat
+    return np.stack([x, y, z], axis=-1)
+
+
+def TEMEToGeodetic(r_teme, jd, fr=0.0):
+    return ECEFToGeodetic(TEMEToECEF(r_teme, jd, fr))
+
+
+if __name__ == '__main__':
+    import time
+    from astropy import units as u
+    from astropy.coordinates import TEME, ITRS, CartesianRepresentation
+    from astropy.time import Time
+    from astropy.utils import iers
+
+    # Compare against astropy without UT1/polar motion tables so that only the
+    # conversion itself is measured
+    iers.conf.auto_download = False
+    iers.conf.iers_degraded_accuracy = 'ignore'
+    rng = np.random.default_rng(0)
+    n_points = 10000
+    directions = rng.normal(size=(n_points, 3))
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    r_teme = directions * rng.uniform(6500.0, 8000.0, size=(n_points, 1))
+    jd = np.full(n_points, 2460500.5)
+    fr = rng.uniform(0.0, 1.0, size=n_points)
+
+    start = time.perf_counter()
+    lat, lon, alt = TEMEToGeodetic(r_teme, jd, fr)
+    numpy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    obstime = Time(jd, fr, format='jd', scale='utc')
+    itrs = TEME(CartesianRepresentation(r_teme.T * u.km), obstime=obstime).transform_to(
+        ITRS(obstime=obstime))
+    location = itrs.earth_location
+    astropy_seconds = time.perf_counter() - start
+
+    dlon = (lon - location.lon.deg + 180.0) % 360.0 - 180.0
+    ground_error_m = 1000.0 * np.hypot(
+        np.radians(lat - location.lat.deg) * A_KM,
+        np.radians(dlon) * A_KM * np.cos(np.radians(lat)))
+    print(f"{n_points} points: numpy {numpy_seconds * 1000:.1f} ms, "
+          f"astropy {astropy_seconds * 1000:.1f} ms")
+    print(f"max ground error: {ground_error_m.max():.2f} m, "
+          f"max altitude error: {1000.0 * np.abs(alt - location.height.to_value(u.km)).max():.3f} m")
@@ -0,0 +1,140 @@
+import json
+import os
+import queue
+import threading
+import time
+from math import floor
+import modules.Catalog as Catalog
+import modules.LiveTracking as LiveTracking
+import modules.ResultCache as ResultCache
+
+TICK_SECONDS = float(os.environ.get("PARISAT_PUSH_TICK", 1))
+KEEPALIVE_SECONDS = 15
+# Frames a slow client may lag behind before its oldest ones are dropped
+QUEUE_FRAMES = 8
+# Every stream holds a request thread of the worker for as long as its viewer
+# stays. Past this many per worker, browsers poll Poll() instead
+MAX_SUBSCRIBERS = int(os.environ.get("PARISAT_PUSH_SUBSCRIBERS", 8))
+POLL_SECONDS = 2
+
+_subscribers = set()
+_track_frame = None
+_thread = None
+_lock = threading.Lock()
+
+
+def _Event(name, payload):
+    return f"event: {name}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n".encode()
+
+
+def _Publish(frame):
+    with _lock:
+        subscribers = list(_subscribers)
+    for subscriber in subscribers:
+        while True:
+            try:
+                subscriber.put_nowait(frame)
+                break
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+def _Frames(now):
+    # Payloads of the "position" and "track" events. The browser draws the
+    # footprint itself, so only the positions are computed
+    satellites = [norad_id for norad_id in Catalog.SATELLITES
+                  if norad_id != Catalog.PRIMARY_NORAD_ID]
+    positions = LiveTracking.Positions(now, satellites)
+    return {
+        "position": {
+            "t": round(now, 3),
+            "lat": round(positions["lat"], 4),
+            "lon": round(positions["lon"], 4),
+            "alt": round(positions["altitude"], 3),
+            "satellites": positions["satellites"],
+        },
+        "track": {"lat": positions["track_lats"], "lon": positions["track_lons"]},
+        "track_key": positions["track_key"],
+    }
+
+
+def _Tick(now, track_key):
+    global _track_frame
+    frames = _Frames(now)
+    if frames["track_key"] != track_key:
+        frame = _Event("track", frames["track"])
+        with _lock:
+            _track_frame = frame
+        _Publish(frame)
+    _Publish(_Event("position", frames["position"]))
+    return frames["track_key"]
+
+
+def _Run():
+    # One propagation per tick whatever the number of subscribers, the thread
+    # exits once the last subscriber is gone
+    global _thread
+    track_key = None
+    while True:
+        with _lock:
+            if not _subscribers:
+                _thread = None
+                return
+        try:
+            track_key = _Tick(time.time(), track_key)
+        except Exception:
+            # A failed tick, e.g. no TLE yet, must not end the broadcast
+            pass
+        time.sleep(TICK_SECONDS - time.time() % TICK_SECONDS)
+
+
+def Subscribe():
+    # None once the worker serves MAX_SUBSCRIBERS streams
+    global _thread
+    subscriber = queue.Queue(maxsize=QUEUE_FRAMES)
+    with _lock:
+        if len(_subscribers) >= MAX_SUBSCRIBERS:
+            return None
+        _subscribers.add(subscriber)
+        if _track_frame is not None:
+            subscriber.put_nowait(_track_frame)
+        if _thread is None:
+            _thread = threading.Thread(target=_Run, daemon=True)
+            _thread.start()
+    return subscriber
+
+
+def Unsubscribe(subscriber):
+    with _lock:
+        _subscribers.discard(subscriber)
+
+
+def Stream(subscriber):
+    try:
+        yield b"retry: 2000\n\n"
+        while True:
+            try:
+                yield subscriber.get(timeout=KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield b": keepalive\n\n"
+    finally:
+        Unsubscribe(subscriber)
+
+
+def Subscribers():
+    with _lock:
+        return len(_subscribers)
+
+
+def Poll(track_key=None):
+    # The same frames for browsers past the stream limit, computed once per
+    # poll interval for all of them. The track is only sent when it rolled
+    bucket = floor(time.time() / POLL_SECONDS)
+    frames = ResultCache.GetOrCompute(f"push:{bucket}", 2 * POLL_SECONDS,
+                                      lambda: _Frames(bucket * POLL_SECONDS))
+    if frames["track_key"] == track_key:
+        return {"position": frames["position"], "track_key": track_key}
+    return frames
@@ -1,80 +1,42 @@
-from astropy import units as u
-from poliastro.earth import EarthSatellite
-from poliastro.earth.plotting import GroundtrackPlotter
-from sgp4.api import Satrec, jday
-from poliastro.bodies import Earth
-from poliastro.twobody import Orbit
-from astropy.time import Time
-from poliastro.util import time_range
-from astropy.coordinates import SphericalRepresentation
 import numpy as np
 import plotly.graph_objects as go
-from datetime import datetime, timedelta, timezone
-import requests
-from math import sqrt, degrees, radians, cos, sin
+import time
+import modules.TLEProvider as TLEProvider
+import modules.Ephemeris as Ephemeris
+import modules.Footprint as Footprint
+import modules.Catalog as Catalog
+import modules.ResultCache as ResultCache
+from math import floor
+
+TRACK_ROLL_SECONDS = 60
+WINDOW_SECONDS = 300
+WINDOW_REFRESH_SECONDS = 180
+FOOTPRINT_TRACE = 1
+OBSERVER_TRACE = 2
+TRACK_TRACE = 3
+POSITION_TRACE = 4
+SATELLITES_TRACE = 5
+SNAPSHOT_BUCKET_SECONDS = 2
+WINDOW_BUCKET_SECONDS = 10
 
 
 def GetTLE(norad_cat_id):
-    url = f"https://db.satnogs.org/api/tle/?norad_cat_id={norad_cat_id}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        if data:
-            tle = data[0]
-            return tle
-
-
-def OrbitFromTLE(tle, current_time):
-    satellite = Satrec.twoline2rv(tle['tle1'], tle['tle2'])
-    jd, fr = jday(current_time.year, current_time.month, current_time.day,
-                  current_time.hour, current_time.minute, current_time.second)
-    _, r, v = satellite.sgp4(jd, fr)
-    r = np.array(r) * u.km
-    v = np.array(v) * u.km / u.s
-    orbit = Orbit.from_vectors(Earth, r, v, epoch=Time(current_time))
-    return orbit
-
-
-def CalculateVisibilityRadius(altitude_km):
-    R_earth_km = 6371.0
-    visibility_radius_km = sqrt((R_earth_km + altitude_km)**2 - R_earth_km**2)
-    return visibility_radius_km
-
-
-def GenerateCirclePoints(lat, lon, radius_km, num_points=100):
-    circle_lats = []
-    circle_lons = []
-    for i in range(num_points):
-        angle = radians(float(i) / num_points * 360)
-        dlat = radius_km / 6371.0 * cos(angle)
-        dlon = radius_km / 6371.0 * sin(angle) / cos(radians(lat))
-        circle_lats.append(lat + degrees(dlat))
-        circle_lons.append(lon + degrees(dlon))
-    return circle_lats, circle_lons
-
-
-def LatLon(orb: Orbit, gp):
-    raw_pos, raw_epoch = orb.rv()[0], orb.epoch
-    itrs_pos = gp._from_raw_to_ITRS(raw_pos, raw_epoch)
-    itrs_latlon_pos = itrs_pos.represent_as(SphericalRepresentation)
-    lat = itrs_latlon_pos.lat.to_value(u.deg)
-    lon = itrs_latlon_pos.lon.to_value(u.deg)
-    return lat, lon
-
-
-def ShowOrbit(observer_lat=48.8566, observer_lon=2.3522):
-    tle = GetTLE(60239)
-
-    current_time = datetime.now(timezone.utc)
-    parisat = OrbitFromTLE(tle, current_time)
-    prs_spacecraft = EarthSatellite(parisat, None)
-    period_seconds = parisat.period.to(u.second).value
-    t_span = time_range(
-        current_time, end=current_time + timedelta(seconds=period_seconds)
-    )
+    return TLEProvider.GetTLE(norad_cat_id)
+
 
-    gp = GroundtrackPlotter()
-    gp.update_layout(
+def MapFigure():
+    fig = go.Figure(go.Scattergeo())
+    fig.update_geos(
+        showcoastlines=True,
+        coastlinecolor="Black",
+        showland=True,
+        showocean=True,
+        showlakes=False,
+        showrivers=False,
+        lataxis={"showgrid": True},
+        lonaxis={"showgrid": True},
+    )
+    fig.update_layout(
         showlegend=False,
         paper_bgcolor='rgba(0,0,0,0)',
         dragmode=False,
@@ -87,8 +49,7 @@ def ShowOrbit(observer_lat=48.8566, observer_lon=2.3522):
             )
         ),
     )
-
-    gp.update_geos(
+    fig.update_geos(
         bgcolor='rgba(0,0,0,0)',
         projection_type="natural earth",
         showcountries=True,
@@ -102,17 +63,126 @@ def ShowOrbit(observer_lat=48.8566, observer_lon=2.3522):
         lataxis_gridwidth=0.5,
         lonaxis_gridwidth=0.5
     )
+    return fig
+
+
+def SatellitePositions(satellites, current_time=None):
+    # Every other selected satellite in one vectorized propagation
+    catalog = Catalog.ForSatellites(satellites) if satellites else None
+    if catalog is None:
+        return {"ids": [], "names": [], "lat": [], "lon": []}
+    lat, lon, _ = catalog.Positions(current_time)
+    valid = np.isfinite(lat)
+    return {
+        "ids": [norad_id for norad_id, ok in zip(catalog.norad_ids, valid) if ok],
+        "names": [name for name, ok in zip(catalog.names, valid) if ok],
+        "lat": np.round(lat[valid], 4).tolist(),
+        "lon": np.round(lon[valid], 4).tolist(),
+    }
+
+
+def SatelliteWindow(satellites, current_time, duration):
+    catalog = Catalog.ForSatellites(satellites) if satellites else None
+    if catalog is None:
+        return {"ids": [], "names": [], "t": [], "lat": [], "lon": []}
+    times, lat, lon, _ = catalog.Window(current_time, duration)
+    valid = np.isfinite(lat).all(axis=1)
+    return {
+        "ids": [norad_id for norad_id, ok in zip(catalog.norad_ids, valid) if ok],
+        "names": [name for name, ok in zip(catalog.names, valid) if ok],
+        "t": np.round(times, 3).tolist(),
+        "lat": np.round(lat[valid], 4).tolist(),
+        "lon": np.round(lon[valid], 4).tolist(),
+    }
+
+
+def Positions(current_time=None, satellites=()):
+    # A snapshot without the footprint, which push clients draw themselves
+    tle = GetTLE(Catalog.PRIMARY_NORAD_ID)
+    ephemeris = Ephemeris.ForTLE(tle)
+
+    current_time = time.time() if current_time is None else current_time
+    lat, lon, altitude_km = ephemeris.Position(current_time)
+
+    # The ground track only moves forward once per roll interval, so clients
+    # already holding the current window can skip it
+    track_start = floor(current_time / TRACK_ROLL_SECONDS) * TRACK_ROLL_SECONDS
+    track_lats, track_lons = ephemeris.Track(
+        track_start, ephemeris.period + TRACK_ROLL_SECONDS)
+
+    return {
+        "lat": lat,
+        "lon": lon,
+        "altitude": altitude_km,
+        "track_lats": np.round(track_lats, 4).tolist(),
+        "track_lons": np.round(track_lons, 4).tolist(),
+        "track_key": f"{tle['tle1']}|{track_start:.0f}",
+        "satellites": SatellitePositions(satellites, current_time),
+    }
+
+
+def Snapshot(current_time=None, min_elevation=0.0, satellites=()):
+    snapshot = Positions(current_time, satellites)
+    circle_lats, circle_lons = Footprint.FootprintPolygon(
+        snapshot["lat"], snapshot["lon"], snapshot["altitude"], min_elevation)
+    return {**snapshot, "footprint_lats": circle_lats, "footprint_lons": circle_lons}
+
+
+def EphemerisWindow(current_time=None, duration=WINDOW_SECONDS, satellites=()):
+    tle = GetTLE(Catalog.PRIMARY_NORAD_ID)
+    ephemeris = Ephemeris.ForTLE(tle)
+
+    current_time = time.time() if current_time is None else current_time
+    times, lats, lons, altitudes = ephemeris.Window(current_time, duration)
+    track_lats, track_lons = ephemeris.Track(
+        current_time, ephemeris.period + duration)
+
+    # Longitudes stay unwrapped so the browser can interpolate across the antimeridian
+    return {
+        "now": current_time,
+        "t": np.round(times, 3).tolist(),
+        "lat": np.round(lats, 4).tolist(),
+        "lon": np.round(lons, 4).tolist(),
+        "alt": np.round(altitudes, 3).tolist(),
+        "track_lats": np.round(track_lats, 4).tolist(),
+        "track_lons": np.round(track_lons, 4).tolist(),
+        "satellites": SatelliteWindow(satellites, current_time, duration),
+    }
+
+
+def _CacheKey(kind, bucket, min_elevation, satellites):
+    return f"{kind}:{bucket}:{round(float(min_elevation), 1)}:{','.join(map(str, sorted(satellites)))}"
 
-    altitude_km = np.linalg.norm(parisat.r.to(u.km).value) - 6371.0
-    visibility_radius_km = CalculateVisibilityRadius(altitude_km)
-    lat, lon = LatLon(parisat, gp)
-    circle_lats, circle_lons = GenerateCirclePoints(
-        lat, lon, visibility_radius_km)
 
-    gp.add_trace(
+def SharedSnapshot(min_elevation=0.0, satellites=()):
+    # Every viewer in the same tick bucket shares one snapshot, taken at the
+    # start of the bucket. The observer only moves its own marker, so it is
+    # not part of the key
+    bucket = floor(time.time() / SNAPSHOT_BUCKET_SECONDS)
+    return ResultCache.GetOrCompute(
+        _CacheKey("snapshot", bucket, min_elevation, satellites), 2 * SNAPSHOT_BUCKET_SECONDS,
+        lambda: Snapshot(bucket * SNAPSHOT_BUCKET_SECONDS, min_elevation, satellites))
+
+
+def SharedEphemerisWindow(satellites=()):
+    bucket = floor(time.time() / WINDOW_BUCKET_SECONDS)
+    window = ResultCache.GetOrCompute(
+        _CacheKey("window", bucket, 0.0, satellites), 2 * WINDOW_BUCKET_SECONDS,
+        lambda: EphemerisWindow(bucket * WINDOW_BUCKET_SECONDS, satellites=satellites))
+    # The browser aligns its clock on "now", which must not be the bucket start
+    return {**window, "now": time.time()}
+
+
+def ShowOrbit(observer_lat=48.8566, observer_lon=2.3522, snapshot=None):
+    snapshot = Snapshot() if snapshot is None else snapshot
+    lat, lon = snapshot["lat"], snapshot["lon"]
+
+    fig = MapFigure()
+
+    fig.add_trace(
         go.Scattergeo(
-            lon=circle_lons,
-            lat=circle_lats,
+            lon=snapshot["footprint_lons"],
+            lat=snapshot["footprint_lats"],
             mode='lines',
             line=dict(width=0, color='#FF8668'),
             fill='toself',
@@ -122,7 +192,7 @@ def ShowOrbit(observer_lat=48.8566, observer_lon=2.3522):
         )
     )
 
-    gp.add_trace(
+    fig.add_trace(
         go.Scattergeo(
             lat=[observer_lat],
             lon=[observer_lon],
@@ -137,27 +207,53 @@ def ShowOrbit(observer_lat=48.8566, observer_lon=2.3522):
         )
     )
 
-    gp.plot(
-        prs_spacecraft,
-        t_span,
-        label="Trajectory",
-        color="#FF3503",
-        line_style={"width": 2},
-        marker={
-            "size": 15,
-            "symbol": "circle"
-        },
+    fig.add_trace(
+        go.Scattergeo(
+            lat=snapshot["track_lats"],
+            lon=snapshot["track_lons"],
+            mode="lines",
+            name="Trajectory",
+            line={"width": 2, "color": "#FF3503"},
+            hovertemplate="(%{lat:.4f}°, %{lon:.4f}°)<extra></extra>",
+        )
+    )
+
+    fig.add_trace(
+        go.Scattergeo(
+            lat=[lat],
+            lon=[lon],
+            name="Trajectory",
+            marker={
+                "size": 15,
+                "symbol": "circle",
+                "color": "#FF3503"
+            },
+            showlegend=False,
+            hovertemplate="(%{lat:.4f}°, %{lon:.4f}°)<extra></extra>",
+        )
+    )
+
+    # All the other tracked satellites share one batched trace
+    satellites = snapshot.get("satellites", {"names": [], "lat": [], "lon": []})
+    fig.add_trace(
+        go.Scattergeo(
+            lat=satellites["lat"],
+            lon=satellites["lon"],
+            text=satellites["names"],
+            mode="markers+text",
+            textposition="top center",
+            textfont={"family": "Roboto", "color": "#ECEFF1"},
+            marker={
+                "size": 10,
+                "symbol": "circle",
+                "color": "#FFC107"
+            },
+            showlegend=False,
+            hovertemplate="%{text} (%{lat:.4f}°, %{lon:.4f}°)<extra></extra>",
+        )
     )
-    for data in gp.fig.data:
-        if isinstance(data, go.Scattergeo) and data.name == "Trajectory":
-            latitudes = data.lat
-            longitudes = data.lon
-            hover_text = [f"({lat:.4f}°, {lon:.4f}°)" for lat,
-                          lon in zip(latitudes, longitudes)]
-            data.hovertext = hover_text
-            data.hovertemplate = "%{hovertext}<extra></extra>"
-
-    return gp.fig
+
+    return fig
 
 
 if __name__ == '__main__':
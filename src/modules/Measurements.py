@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import re
+import threading
+import numpy as np
+
+STORE_VERSION = 2
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+CSV_PATH = os.path.join(DATA_DIR, "ScientificMeasurements.csv")
+STORE_DIR = os.environ.get("PARISAT_MEASUREMENTS_DIR", os.path.join(DATA_DIR, "measurements"))
+TIME_COLUMN = "T"
+# Each pyramid level keeps the min and max of LEVEL_FACTOR times larger buckets,
+# down to at most MIN_LEVEL_POINTS points
+LEVEL_FACTOR = 4
+MIN_LEVEL_POINTS = 1024
+MAX_POINTS = int(os.environ.get("PARISAT_PLOT_POINTS", 2000))
+
+_dataset = None
+_lock = threading.Lock()
+
+
+def ChannelSchema(column):
+    # Thermistors are named "<surface> (THx-y)", the photodiode by itself
+    sensor = re.search(r"\((TH\d+-\d+)\)", column)
+    if sensor:
+        return {"name": column, "key": sensor.group(1), "kind": "temperature", "unit": "°C"}
+    if column.lower().startswith("photodiode"):
+        return {"name": column, "key": "Photodiode", "kind": "photodiode", "unit": "mV"}
+    return {"name": column, "key": re.sub(r"[^A-Za-z0-9-]+", "_", column), "kind": "other", "unit": ""}
+
+
+def MinMaxLevel(times, values, bucket):
+    # Min and max of every bucket of samples, in time order, so that peaks
+    # survive the decimation
+    n_buckets = -(-len(values) // bucket)
+    padded = np.full(n_buckets * bucket, np.nan, dtype=values.dtype)
+    padded[:len(values)] = values
+    rows = padded.reshape(n_buckets, bucket)
+    missing = np.isnan(rows)
+    low = np.where(missing, np.inf, rows).argmin(axis=1)
+    high = np.where(missing, -np.inf, rows).argmax(axis=1)
+    offsets = np.arange(n_buckets) * bucket
+    index = np.minimum(np.sort(np.stack([low, high], axis=1), axis=1) + offsets[:, None],
+                       len(values) - 1).ravel()
+    return times[index], values[index]
+
+
+def Build(csv_path=CSV_PATH, store_dir=STORE_DIR):
+    # One .npy file per channel plus schema.json, written last so a reader
+    # never sees a partial store
+    import pandas as pd
+    df = pd.read_csv(csv_path, sep=";").sort_values(TIME_COLUMN, kind="stable")
+    os.makedirs(store_dir, exist_ok=True)
+    times = df[TIME_COLUMN].to_numpy(dtype=np.float64)
+    np.save(os.path.join(store_dir, f"{TIME_COLUMN}.npy"), times)
+    channels = []
+    for column in df.columns:
+        if column == TIME_COLUMN:
+            continue
+        channel = ChannelSchema(column)
+        channel["file"] = f"{channel['key']}.npy"
+        channel["dtype"] = "float32"
+        values = df[column].to_numpy(dtype=np.float32)
+        np.save(os.path.join(store_dir, channel["file"]), values)
+        channel["levels"] = []
+        bucket, points = LEVEL_FACTOR, len(values)
+        while points > MIN_LEVEL_POINTS:
+            level_times, level_values = MinMaxLevel(times, values, bucket)
+            level = {"bucket": bucket, "times": f"{channel['key']}.{bucket}.t.npy",
+                     "values": f"{channel['key']}.{bucket}.npy"}
+            np.save(os.path.join(store_dir, level["times"]), level_times)
+            np.save(os.path.join(store_dir, level["values"]), level_values)
+            channel["levels"].append(level)
+            bucket, points = bucket * LEVEL_FACTOR, len(level_values)
+        channels.append(channel)
+    schema = {
+        "version": STORE_VERSION,
+        "rows": len(df),
+        "time": {"name": TIME_COLUMN, "file": f"{TIME_COLUMN}.npy", "unit": "s", "dtype": "float64"},
+        "channels": channels,
+    }
+    tmp_path = os.path.join(store_dir, f"schema.json.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, os.path.join(store_dir, "schema.json"))
+    return schema
+
+
+class Dataset:
+    # Channels are memory-mapped, only the pages of the selected time range
+    # are ever read
+    def __init__(self, store_dir, schema):
+        self.schema = schema
+        self.channels = schema["channels"]
+        self._arrays = (
+            np.load(os.path.join(store_dir, schema["time"]["file"]), mmap_mode="r"),
+            {channel["name"]: np.load(os.path.join(store_dir, channel["file"]), mmap_mode="r")
+             for channel in self.channels})
+        self._levels = {channel["name"]: [
+            (level["bucket"],
+             np.load(os.path.join(store_dir, level["times"]), mmap_mode="r"),
+             np.load(os.path.join(store_dir, level["values"]), mmap_mode="r"))
+            for level in channel.get("levels", [])] for channel in self.channels}
+
+    def _Arrays(self):
+        # Time axis and channels as one snapshot, callers never mix two mappings
+        return self._arrays
+
+    def Count(self):
+        return len(self._Arrays()[0])
+
+    def Slice(self, i0, i1):
+        time, columns = self._Arrays()
+        return time[i0:i1], {name: column[i0:i1] for name, column in columns.items()}
+
+    def Names(self, kind=None):
+        return [channel["name"] for channel in self.channels if kind is None or channel["kind"] == kind]
+
+    def Range(self):
+        time = self._Arrays()[0]
+        if not len(time):
+            return None
+        return float(time[0]), float(time[-1])
+
+    def Select(self, names=None, t0=None, t1=None):
+        # Times and channel values of [t0, t1], as views on the mapped files
+        time, columns = self._Arrays()
+        names = self.Names() if names is None else names
+        i0 = 0 if t0 is None else int(np.searchsorted(time, t0, side="left"))
+        i1 = len(time) if t1 is None else int(np.searchsorted(time, t1, side="right"))
+        return time[i0:i1], {name: columns[name][i0:i1] for name in names}
+
+    def Decimated(self, names=None, t0=None, t1=None, max_points=MAX_POINTS):
+        # Per channel (times, values) of [t0, t1] from the finest pyramid level
+        # that fits in max_points, plus one sample on each side so the lines
+        # reach the edges of the window
+        time, columns = self._Arrays()
+        names = self.Names() if names is None else names
+        i0 = 0 if t0 is None else int(np.searchsorted(time, t0, side="left"))
+        i1 = len(time) if t1 is None else int(np.searchsorted(time, t1, side="right"))
+        selected = {}
+        for name in names:
+            times, values = time, columns[name]
+            levels = self._levels[name]
+            if i1 - i0 > max_points and levels:
+                fitting = [level for level in levels if 2 * (i1 - i0) // level[0] <= max_points]
+                _, times, values = fitting[0] if fitting else levels[-1]
+            j0 = 0 if t0 is None else max(int(np.searchsorted(times, t0, side="left")) - 1, 0)
+            j1 = len(times) if t1 is None else int(np.searchsorted(times, t1, side="right")) + 1
+            # Stores without a pyramid, such as the live one, fall back to a stride
+            step = max(1, -(-(j1 - j0) // max_points))
+            selected[name] = times[j0:j1:step], values[j0:j1:step]
+        return selected
+
+
+class LiveDataset(Dataset):
+    # Append-only raw files written by modules.Telemetry, mapped again
+    # whenever they grow
+    def __init__(self, store_dir, schema):
+        self.schema = schema
+        self.channels = schema["channels"]
+        self._files = [(None, os.path.join(store_dir, schema["time"]["file"]), np.dtype(schema["time"]["dtype"]))]
+        self._files += [(channel["name"], os.path.join(store_dir, channel["file"]), np.dtype(channel["dtype"]))
+                        for channel in self.channels]
+        self._levels = {channel["name"]: [] for channel in self.channels}
+        self._arrays = None
+        self._rows = None
+        self._lock = threading.Lock()
+
+    def _Arrays(self):
+        # Only rows present in every file are complete
+        rows = min(os.path.getsize(path) // dtype.itemsize for _, path, dtype in self._files)
+        with self._lock:
+            if rows != self._rows:
+                arrays = {name: np.memmap(path, dtype=dtype, mode="r", shape=(rows,)) if rows else np.empty(0, dtype)
+                          for name, path, dtype in self._files}
+                self._arrays = (arrays.pop(None), arrays)
+                self._rows = rows
+            return self._arrays
+
+
+def Read(store_dir=STORE_DIR):
+    try:
+        with open(os.path.join(store_dir, "schema.json"), encoding="utf-8") as f:
+            schema = json.load(f)
+        if schema.get("version") != STORE_VERSION:
+            return None
+        if schema.get("live"):
+            return LiveDataset(store_dir, schema)
+        return Dataset(store_dir, schema)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def Load():
+    global _dataset
+    if _dataset is None:
+        with _lock:
+            if _dataset is None:
+                dataset = Read()
+                if dataset is None:
+                    # Missing or outdated store: convert the CSV once, this needs pandas
+                    Build()
+                    dataset = Read()
+                _dataset = dataset
+    return _dataset
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Convert the PariSat measurements to memory-mapped channels")
+    parser.add_argument("command", nargs="?", choices=["build"], default="build")
+    parser.add_argument("--input", default=CSV_PATH)
+    parser.add_argument("--output", default=STORE_DIR)
+    args = parser.parse_args()
+    schema = Build(args.input, args.output)
+    print(f"{len(schema['channels'])} channels of {schema['rows']} rows written to {args.output}")
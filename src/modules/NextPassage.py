@@ -1,22 +1,85 @@
 from skyfield.api import Topos, load
 from skyfield.sgp4lib import EarthSatellite
+from collections import OrderedDict
 from datetime import timedelta
-import requests
+import csv
+import io
+import numpy as np
+import os
+import threading
+import modules.TLEProvider as TLEProvider
+import modules.ComputePool as ComputePool
+
+CELL_DEGREES = 0.01
+SEARCH_DAYS = 3
+TABLE_DAYS = 4
+TABLE_LEAD = timedelta(minutes=30)
+MAX_TABLES = 256
+MAX_OBSERVERS = 1024
+TRACK_STEP = 1.0
+MAX_TRACKS = 256
+# Reference downlink frequency for the Doppler shift, in Hz
+DOWNLINK_FREQUENCY = float(os.environ.get("PARISAT_DOWNLINK_FREQUENCY", 437.0e6))
+SPEED_OF_LIGHT = 299792.458
+
+_tables = OrderedDict()
+_tracks = OrderedDict()
+_table_locks = {}
+_lock = threading.Lock()
+_context = None
+
+
+class SkyContext:
+    # Worker-wide skyfield state: one timescale, satellites parsed once per TLE
+    # and observers reused per rounded position
+    def __init__(self):
+        self.ts = load.timescale()
+        self._satellites = {}
+        self._observers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def Satellite(self, tle_line1, tle_line2):
+        key = tle_line1[2:7]
+        with self._lock:
+            lines, satellite = self._satellites.get(key, (None, None))
+            if lines != (tle_line1, tle_line2):
+                satellite = EarthSatellite(
+                    tle_line1, tle_line2, 'Satellite', self.ts)
+                self._satellites[key] = ((tle_line1, tle_line2), satellite)
+            return satellite
+
+    def Observer(self, observer_lat, observer_lon):
+        key = (round(observer_lat, 6), round(observer_lon, 6))
+        with self._lock:
+            observer = self._observers.get(key)
+            if observer is None:
+                observer = self._observers[key] = Topos(
+                    latitude_degrees=key[0], longitude_degrees=key[1])
+                while len(self._observers) > MAX_OBSERVERS:
+                    self._observers.popitem(last=False)
+            else:
+                self._observers.move_to_end(key)
+            return observer
+
+
+def Context():
+    global _context
+    if _context is None:
+        with _lock:
+            if _context is None:
+                _context = SkyContext()
+    return _context
 
 
 def GetTLE(norad_cat_id):
-    url = f"https://db.satnogs.org/api/tle/?norad_cat_id={norad_cat_id}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        if data:
-            tle = data[0]
-            return tle['tle1'], tle['tle2']
+    tle = TLEProvider.GetTLE(norad_cat_id)
+    if tle:
+        return tle['tle1'], tle['tle2']
 
 
 def RoundTime(ti):
     dt = ti.utc_datetime().replace(microsecond=0)
-    return load.timescale().utc(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+    return Context().ts.utc(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
 
 
 def FindNextPass(satellite, observer, t, min_elevation):
@@ -54,21 +117,186 @@ def FindNextPass(satellite, observer, t, min_elevation):
                 rise_time = culminate_time = set_time = None
     return None, None, None, None, None, None
 
+def PassEvents(tle_line1, tle_line2, cell_lat, cell_lon, start_tt, end_tt):
+    # Rise, culmination, set and peak altitude of every pass over the cell.
+    # Only plain values go in and out, so it can run in modules.ComputePool
+    context = Context()
+    satellite = context.Satellite(tle_line1, tle_line2)
+    observer = context.Observer(cell_lat, cell_lon)
+    times, events = satellite.find_events(
+        observer, context.ts.tt_jd(start_tt), context.ts.tt_jd(end_tt), altitude_degrees=0.0)
+    altitudes = (satellite - observer).at(times).altaz()[0].degrees
+    rises, culminations, sets, max_altitudes = [], [], [], []
+    rise = culmination = None
+    max_altitude = -90.0
+    for time_tt, event, altitude in zip(times.tt, events, altitudes):
+        if event == 0:
+            rise, culmination, max_altitude = time_tt, None, -90.0
+        elif event == 1 and rise is not None and altitude > max_altitude:
+            culmination, max_altitude = time_tt, altitude
+        elif event == 2 and rise is not None and culmination is not None:
+            rises.append(rise)
+            culminations.append(culmination)
+            sets.append(time_tt)
+            max_altitudes.append(max_altitude)
+            rise = culmination = None
+    return np.array(rises), np.array(culminations), np.array(sets), np.array(max_altitudes)
+
+
+class PassTable:
+    def __init__(self, start_tt, end_tt, events):
+        self.start, self.end = start_tt, end_tt
+        self.rise, self.culmination, self.set, self.max_altitude = events
+
+    def Covers(self, t0, t1):
+        return self.start <= t0 and t1 <= self.end
+
+    def Between(self, t0, t1):
+        # Passes still in progress at t0 count, as long as they rise before t1
+        i0 = np.searchsorted(self.set, t0, side='right')
+        i1 = np.searchsorted(self.rise, t1, side='right')
+        return np.arange(i0, max(i0, i1))
+
+
+def ObserverCell(observer_lat, observer_lon):
+    return (round(round(observer_lat / CELL_DEGREES) * CELL_DEGREES, 6),
+            round(round(observer_lon / CELL_DEGREES) * CELL_DEGREES, 6))
+
+
+def GetPassTable(tle, observer_lat, observer_lon, t):
+    satellite = Context().Satellite(*tle)
+    cell_lat, cell_lon = ObserverCell(observer_lat, observer_lon)
+    key = (satellite.model.satnum, satellite.model.jdsatepoch,
+           satellite.model.jdsatepochF, cell_lat, cell_lon)
+    t1 = t.tt + SEARCH_DAYS
+    with _lock:
+        table = _tables.get(key)
+        if table is not None and table.Covers(t.tt, t1):
+            _tables.move_to_end(key)
+            return table
+        key_lock = _table_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        with _lock:
+            table = _tables.get(key)
+        if table is None or not table.Covers(t.tt, t1):
+            start_tt = t.tt - TABLE_LEAD.total_seconds() / 86400.0
+            end_tt = t.tt + TABLE_DAYS
+            # The event search is the CPU-bound part, threaded workers hand it to processes
+            table = PassTable(start_tt, end_tt, ComputePool.Run(
+                PassEvents, *tle, cell_lat, cell_lon, start_tt, end_tt))
+        with _lock:
+            _tables[key] = table
+            _tables.move_to_end(key)
+            while len(_tables) > MAX_TABLES:
+                evicted, _ = _tables.popitem(last=False)
+                _table_locks.pop(evicted, None)
+    return table
+
+
+class SkyTrack:
+    # Whole pass sampled every step seconds from rise to set, in one skyfield
+    # evaluation. The Doppler shift is derived on export so any frequency
+    # shares the same cached track
+    def __init__(self, satellite, cell_lat, cell_lon, rise, set_time, step):
+        context = Context()
+        observer = context.Observer(cell_lat, cell_lon)
+        duration = (set_time - rise) * 86400.0
+        offsets = np.append(np.arange(0.0, duration, step), duration)
+        times = context.ts.tt_jd(rise, offsets / 86400.0)
+        topocentric = (satellite - observer).at(times)
+        alt, az, distance = topocentric.altaz()
+        r = topocentric.position.km
+        v = topocentric.velocity.km_per_s
+        self.times = times.utc_datetime()
+        self.azimuth = az.degrees
+        self.elevation = alt.degrees
+        self.range = distance.km
+        self.range_rate = np.einsum('ij,ij->j', r, v) / self.range
+
+    def Doppler(self, frequency=DOWNLINK_FREQUENCY):
+        return -frequency * self.range_rate / SPEED_OF_LIGHT
+
+    def Rows(self, frequency=DOWNLINK_FREQUENCY):
+        return [
+            {"time": time.isoformat(), "azimuth": round(float(azimuth), 3),
+             "elevation": round(float(elevation), 3), "range_km": round(float(distance), 3),
+             "range_rate_km_s": round(float(range_rate), 4), "doppler_hz": round(float(doppler), 1)}
+            for time, azimuth, elevation, distance, range_rate, doppler in zip(
+                self.times, self.azimuth, self.elevation, self.range,
+                self.range_rate, self.Doppler(frequency))
+        ]
+
+    def ToCSV(self, frequency=DOWNLINK_FREQUENCY):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, lineterminator="\n", fieldnames=[
+            "time", "azimuth", "elevation", "range_km", "range_rate_km_s", "doppler_hz"])
+        writer.writeheader()
+        writer.writerows(self.Rows(frequency))
+        return output.getvalue()
+
+
+def _NextPasses(observer_lat, observer_lon, min_elevation, count, t):
+    context = Context()
+    ts = context.ts
+    tle = GetTLE(60239)
+    satellite = context.Satellite(*tle)
+    t = ts.now() if t is None else t
+    table = GetPassTable(tle, observer_lat, observer_lon, t)
+    candidates = table.Between(t.tt, t.tt + SEARCH_DAYS)
+    if not len(candidates):
+        return satellite, table, candidates, []
+
+    # Culmination values are reported for the exact observer, not the cell center
+    observer = context.Observer(observer_lat, observer_lon)
+    culminations = ts.tt_jd(table.culmination[candidates])
+    year, month, day, hour, minute, second = culminations.utc
+    rounded = ts.utc(year, month, day, hour, minute, np.floor(second))
+    alt, az, distance = (satellite - observer).at(rounded).altaz()
+    selected = np.flatnonzero(alt.degrees >= min_elevation)[:count]
+
+    rise_times = ts.tt_jd(table.rise[candidates][selected]).utc_datetime()
+    culminate_times = culminations[selected].utc_datetime()
+    set_times = ts.tt_jd(table.set[candidates][selected]).utc_datetime()
+    return satellite, table, candidates[selected], [
+        (rise_times[i], culminate_times[i], set_times[i],
+         round(float(az.degrees[j]), 2), round(float(alt.degrees[j]), 2), int(distance.km[j]))
+        for i, j in enumerate(selected)
+    ]
+
+
+def NextPasses(observer_lat, observer_lon, min_elevation, count=1, t=None):
+    return _NextPasses(observer_lat, observer_lon, min_elevation, count, t)[-1]
+
+
+def NextPassTrack(observer_lat, observer_lon, min_elevation, step=TRACK_STEP, t=None):
+    # Next pass and its sky track, the track is computed for the observer cell
+    # and cached per (cell, pass, step)
+    satellite, table, indices, passes = _NextPasses(
+        observer_lat, observer_lon, min_elevation, 1, t)
+    if not passes:
+        return None, None
+    i = indices[0]
+    cell_lat, cell_lon = ObserverCell(observer_lat, observer_lon)
+    key = (satellite.model.satnum, satellite.model.jdsatepoch, satellite.model.jdsatepochF,
+           cell_lat, cell_lon, float(table.rise[i]), float(step))
+    with _lock:
+        track = _tracks.get(key)
+        if track is not None:
+            _tracks.move_to_end(key)
+            return passes[0], track
+    track = SkyTrack(satellite, cell_lat, cell_lon, table.rise[i], table.set[i], step)
+    with _lock:
+        _tracks[key] = track
+        while len(_tracks) > MAX_TRACKS:
+            _tracks.popitem(last=False)
+    return passes[0], track
+
+
 def NextPass(observer_lat, observer_lon, min_elevation):
-    tle_line1, tle_line2 = GetTLE(60239)
-    satellite = EarthSatellite(
-        tle_line1, tle_line2, 'Satellite', load.timescale())
-    observer = Topos(latitude_degrees=observer_lat,
-                     longitude_degrees=observer_lon)
-    ts = load.timescale()
-    t = ts.now()
-    rise_time, culminate_time, set_time, culmination_azimuth, culmination_elevation, culmination_distance = FindNextPass(
-        satellite, observer, t, min_elevation)
-    t_dt = t.utc_datetime()
-    if not rise_time and set_time and t_dt <= set_time:
-        rise_time, culminate_time, set_time, culmination_azimuth, culmination_elevation, culmination_distance = FindNextPass(
-            satellite, observer, t - timedelta(minutes=30), min_elevation)
-    return rise_time, culminate_time, set_time, culmination_azimuth, culmination_elevation, culmination_distance
+    passes = NextPasses(observer_lat, observer_lon, min_elevation)
+    if passes:
+        return passes[0]
+    return None, None, None, None, None, None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+from datetime import datetime, timezone
+import numpy as np
+import os
+import time
+import modules.ComputePool as ComputePool
+import modules.Ephemeris as Ephemeris
+import modules.Geodetic as Geodetic
+import modules.TLEProvider as TLEProvider
+
+NORAD_ID = 60239
+STEP_SECONDS = float(os.environ.get("PARISAT_PASS_STEP", 20))
+SEARCH_DAYS = 3
+LEAD_SECONDS = 1800
+REFINE_ITERATIONS = 3
+# Observer x time samples evaluated at once, bounds the memory of one block
+BLOCK_SAMPLES = 1000000
+MIN_OBSERVERS_PER_PROCESS = 64
+
+
+def SatelliteECEF(satellite, times):
+    jd, fr = Ephemeris.JulianDate(times)
+    errors, r, _ = satellite.sgp4_array(jd, fr)
+    r_ecef = Geodetic.TEMEToECEF(r, jd, fr)
+    r_ecef[errors != 0] = np.nan
+    return r_ecef
+
+
+def ObserverFrames(lats, lons, alts=0.0):
+    # Position and local east/north/up unit vectors of each observer in ECEF
+    position = Geodetic.GeodeticToECEF(lats, lons, alts)
+    lat, lon = np.radians(lats), np.radians(lons)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    sin_lon, cos_lon = np.sin(lon), np.cos(lon)
+    east = np.stack([-sin_lon, cos_lon, np.zeros_like(lon)], axis=-1)
+    north = np.stack([-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat], axis=-1)
+    up = np.stack([cos_lat * cos_lon, cos_lat * sin_lon, sin_lat], axis=-1)
+    return position, east, north, up
+
+
+def SineElevation(sat_ecef, position, up):
+    # Elevation is only compared and interpolated, its sine is enough and skips the arcsin
+    rho = sat_ecef - position
+    return np.einsum('...i,...i->...', rho, up) / np.sqrt(np.einsum('...i,...i->...', rho, rho))
+
+
+def _SineElevationMatrix(sat_ecef, position, up):
+    # rho.up and |rho|^2 expanded into matrix products, observers x times
+    up_component = up @ sat_ecef.T - np.einsum('ij,ij->i', position, up)[:, None]
+    distance2 = (np.einsum('ij,ij->i', sat_ecef, sat_ecef)[None]
+                 - 2.0 * position @ sat_ecef.T
+                 + np.einsum('ij,ij->i', position, position)[:, None])
+    return up_component / np.sqrt(distance2)
+
+
+def LookAngles(sat_ecef, position, east, north, up):
+    rho = sat_ecef - position
+    distance = np.linalg.norm(rho, axis=-1)
+    elevation = np.degrees(np.arcsin(np.einsum('...i,...i->...', rho, up) / distance))
+    azimuth = np.degrees(np.arctan2(np.einsum('...i,...i->...', rho, east),
+                                    np.einsum('...i,...i->...', rho, north))) % 360.0
+    return azimuth, elevation, distance
+
+
+def _RefineCrossings(satellite, position, up, t_lo, t_hi, e_lo, e_hi):
+    # Regula falsi on the exact elevation, each iteration is one vectorized
+    # propagation over every horizon crossing of the block
+    for _ in range(REFINE_ITERATIONS):
+        t_mid = t_lo - e_lo * (t_hi - t_lo) / (e_hi - e_lo)
+        e_mid = SineElevation(SatelliteECEF(satellite, t_mid), position, up)
+        low_side = np.sign(e_mid) == np.sign(e_lo)
+        t_lo, e_lo = np.where(low_side, t_mid, t_lo), np.where(low_side, e_mid, e_lo)
+        t_hi, e_hi = np.where(low_side, t_hi, t_mid), np.where(low_side, e_hi, e_mid)
+    return t_lo - e_lo * (t_hi - t_lo) / (e_hi - e_lo)
+
+
+def _RefineCulminations(satellite, position, up, t_peak, h):
+    # Parabola through three exact samples, with a shrinking spacing
+    for _ in range(REFINE_ITERATIONS):
+        samples = np.stack([t_peak - h, t_peak, t_peak + h])
+        e = SineElevation(SatelliteECEF(satellite, samples.ravel()).reshape(3, -1, 3),
+                      position[None], up[None])
+        curvature = e[0] - 2.0 * e[1] + e[2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offset = np.where(curvature < 0.0, 0.5 * h * (e[0] - e[2]) / curvature, 0.0)
+        t_peak = t_peak + np.clip(offset, -h, h)
+        h = h / 4.0
+    return t_peak
+
+
+def _PassesForBlock(satellite, times, sat_ecef, lats, lons, alts):
+    position, east, north, up = ObserverFrames(lats, lons, alts)
+    elevation = _SineElevationMatrix(sat_ecef, position, up)
+    above = elevation > 0.0
+    observer, k = np.nonzero(above[:, 1:] != above[:, :-1])
+    rising = above[observer, k + 1]
+
+    # A pass is a rising crossing directly followed by a setting one of the same observer
+    starts = np.flatnonzero(rising[:-1] & ~rising[1:] & (observer[:-1] == observer[1:]))
+    ends = starts + 1
+    crossings = np.concatenate([starts, ends])
+    crossing_times = _RefineCrossings(
+        satellite, position[observer[crossings]], up[observer[crossings]],
+        times[k[crossings]], times[k[crossings] + 1],
+        elevation[observer[crossings], k[crossings]],
+        elevation[observer[crossings], k[crossings] + 1])
+    pass_observer = observer[starts]
+    rise_times, set_times = np.split(crossing_times, 2)
+
+    # Highest sample of each pass, the segment lies strictly between the two crossings
+    first, last = k[starts] + 1, k[ends]
+    offsets = np.arange((last - first).max() + 1 if len(starts) else 1)
+    segment = np.minimum(first[:, None] + offsets[None], last[:, None])
+    peak = segment[np.arange(len(starts)), np.argmax(
+        elevation[pass_observer[:, None], segment], axis=1)]
+    culmination_times = _RefineCulminations(
+        satellite, position[pass_observer], up[pass_observer],
+        times[peak], (times[1] - times[0]) / 2.0)
+    culmination_times = np.clip(culmination_times, rise_times, set_times)
+
+    # Reported values are taken at the whole second, like NextPassage
+    azimuth, culmination_elevation, distance = LookAngles(
+        SatelliteECEF(satellite, np.floor(culmination_times)), position[pass_observer],
+        east[pass_observer], north[pass_observer], up[pass_observer])
+    return (pass_observer, rise_times, culmination_times, set_times,
+            azimuth, culmination_elevation, distance)
+
+
+def _PredictChunk(tle, lats, lons, alts, min_elevations, t, days, count):
+    satellite = Ephemeris.ForTLE(tle).satellite
+    end = t + days * 86400.0
+    times = np.arange(t - LEAD_SECONDS, end + LEAD_SECONDS + STEP_SECONDS, STEP_SECONDS)
+    sat_ecef = SatelliteECEF(satellite, times)
+    block = max(1, BLOCK_SAMPLES // len(times))
+    passes = [[] for _ in range(len(lats))]
+    for i0 in range(0, len(lats), block):
+        i1 = min(i0 + block, len(lats))
+        (pass_observer, rise_times, culmination_times, set_times,
+         azimuth, elevation, distance) = _PassesForBlock(
+            satellite, times, sat_ecef, lats[i0:i1], lons[i0:i1], alts[i0:i1])
+        # Passes still in progress at t count, as long as they rise before the end
+        keep = ((set_times > t) & (rise_times < end)
+                & (elevation >= min_elevations[i0:i1][pass_observer]))
+        for j in np.flatnonzero(keep):
+            observer_passes = passes[i0 + pass_observer[j]]
+            if count is None or len(observer_passes) < count:
+                observer_passes.append((
+                    float(rise_times[j]), float(culmination_times[j]), float(set_times[j]),
+                    round(float(azimuth[j]), 2), round(float(elevation[j]), 2),
+                    int(distance[j])))
+    return passes
+
+
+def _UTC(unix_time):
+    return datetime.fromtimestamp(unix_time, timezone.utc)
+
+
+def PredictPasses(observer_lats, observer_lons, min_elevation=0.0, days=SEARCH_DAYS,
+                  count=None, t=None, observer_alts=0.0, processes=None):
+    # Passes of every observer over [t, t + days], one list of NextPass-like
+    # tuples per observer, in the order of the inputs
+    lats = np.atleast_1d(np.asarray(observer_lats, dtype=float))
+    lons = np.broadcast_to(np.asarray(observer_lons, dtype=float), lats.shape)
+    alts = np.broadcast_to(np.asarray(observer_alts, dtype=float) / 1000.0, lats.shape)
+    min_elevations = np.broadcast_to(np.asarray(min_elevation, dtype=float), lats.shape)
+    t = time.time() if t is None else float(t)
+    tle = TLEProvider.GetTLE(NORAD_ID)
+    if not tle or not len(lats):
+        return [[] for _ in range(len(lats))]
+
+    # Large batches are split across the shared compute pool, sized by
+    # PARISAT_COMPUTE_PROCESSES. processes only lowers the number of chunks
+    processes = ComputePool.MAX_PROCESSES if processes is None else min(processes, ComputePool.MAX_PROCESSES)
+    n_chunks = min(processes, len(lats) // MIN_OBSERVERS_PER_PROCESS)
+    if n_chunks > 1:
+        bounds = np.linspace(0, len(lats), n_chunks + 1).astype(int)
+        chunks = ComputePool.Map(_PredictChunk, [
+            (tle, lats[i0:i1], lons[i0:i1], alts[i0:i1], min_elevations[i0:i1], t, days, count)
+            for i0, i1 in zip(bounds[:-1], bounds[1:])])
+        passes = [p for chunk in chunks for p in chunk]
+    else:
+        passes = _PredictChunk(tle, lats, lons, alts, min_elevations, t, days, count)
+    return [[(_UTC(rise), _UTC(culmination), _UTC(set_time), azimuth, elevation, distance)
+             for rise, culmination, set_time, azimuth, elevation, distance in observer_passes]
+            for observer_passes in passes]
+
+
+if __name__ == '__main__':
+    import modules.NextPassage as NextPassage
+    rng = np.random.default_rng(0)
+    lats = np.degrees(np.arcsin(rng.uniform(-0.9, 0.9, 50)))
+    lons = rng.uniform(-180.0, 180.0, 50)
+    now = time.time()
+    start = time.perf_counter()
+    batch = PredictPasses(lats, lons, 10.0, count=1, t=now)
+    print(f"{len(lats)} observers in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Agreement with the skyfield based search of NextPassage
+    ts = NextPassage.Context().ts
+    worst = np.zeros(4)
+    for lat, lon, passes in zip(lats, lons, batch):
+        reference = NextPassage.NextPasses(lat, lon, 10.0, t=ts.from_datetime(_UTC(now)))
+        if not passes or not reference:
+            if passes or reference:
+                print("mismatch at", lat, lon, passes, reference)
+            continue
+        ours, theirs = passes[0], reference[0]
+        worst = np.maximum(worst, [
+            max(abs((a - b).total_seconds()) for a, b in zip(ours[:3], theirs[:3])),
+            abs((ours[3] - theirs[3] + 180.0) % 360.0 - 180.0),
+            abs(ours[4] - theirs[4]), abs(ours[5] - theirs[5])])
+    print(f"max difference: {worst[0]:.1f} s, azimuth {worst[1]:.2f}°, "
+          f"elevation {worst[2]:.2f}°, distance {worst[3]:.0f} km")
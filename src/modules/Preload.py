@@ -0,0 +1,29 @@
+import gc
+import modules.FlightArtifact as FlightArtifact
+
+
+def Warm():
+    # Immutable state built once in the gunicorn master before it forks, the
+    # workers then share it copy-on-write. Bulk data lives in NumPy arrays and
+    # memory maps, whose pages reference counting never writes to
+    FlightArtifact.Load()
+
+    import modules.Measurements as Measurements
+    Measurements.Load()
+
+    import modules.ScientificAnalysis as ScientificAnalysis
+    import modules.LiveTracking as LiveTracking
+    import modules.Catalog as Catalog
+    import modules.Ephemeris as Ephemeris
+    import modules.NextPassage as NextPassage
+    import modules.PassPrediction as PassPrediction
+    import modules.LiveBroadcast as LiveBroadcast
+    NextPassage.Context()
+    tle = LiveTracking.GetTLE(Catalog.PRIMARY_NORAD_ID)
+    if tle:
+        Ephemeris.ForTLE(tle).Table()
+
+    # Keep the collector from writing to the headers of every preloaded
+    # object, which would copy their pages into each worker
+    gc.collect()
+    gc.freeze()
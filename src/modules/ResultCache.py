@@ -0,0 +1,122 @@
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+
+# "memory" keeps results per worker, "redis://host:port/db" shares them across
+# gunicorn workers through any Redis-compatible server
+CACHE_URL = os.environ.get("PARISAT_CACHE_URL", "memory")
+MAX_ENTRIES = int(os.environ.get("PARISAT_CACHE_ENTRIES", 1024))
+KEY_PREFIX = "parisat:"
+# Seconds before an unresponsive Redis counts as a miss
+REDIS_TIMEOUT = float(os.environ.get("PARISAT_CACHE_TIMEOUT", 0.5))
+# Seconds Redis is left alone after an error
+REDIS_RETRY = float(os.environ.get("PARISAT_CACHE_RETRY", 5))
+
+_backend = None
+_key_locks = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def _Count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def Get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def Set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    def __init__(self, url):
+        # Only needed when a Redis URL is configured
+        import redis
+        self.client = redis.Redis.from_url(
+            url, socket_timeout=REDIS_TIMEOUT, socket_connect_timeout=REDIS_TIMEOUT)
+        self.errors = redis.RedisError
+        self.retry_at = 0.0
+
+    # A broken cache is a miss and a lost write, the callbacks compute instead
+    # and skip Redis for REDIS_RETRY seconds rather than wait on every call
+    def _Call(self, method, *args, **kwargs):
+        if time.time() < self.retry_at:
+            return None
+        try:
+            return method(*args, **kwargs)
+        except self.errors:
+            self.retry_at = time.time() + REDIS_RETRY
+            _Count("errors")
+            return None
+
+    def Get(self, key):
+        value = self._Call(self.client.get, KEY_PREFIX + key)
+        return None if value is None else json.loads(value)
+
+    def Set(self, key, value, ttl):
+        self._Call(self.client.set, KEY_PREFIX + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+
+
+def Backend():
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                if CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+                    _backend = RedisBackend(CACHE_URL)
+                else:
+                    _backend = MemoryBackend()
+    return _backend
+
+
+def Stats():
+    with _lock:
+        return dict(_stats)
+
+
+def GetOrCompute(key, ttl, compute):
+    # Concurrent misses on the same key in a worker wait for a single computation
+    backend = Backend()
+    value = backend.Get(key)
+    if value is not None:
+        with _lock:
+            _stats["hits"] += 1
+        return value
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        value = backend.Get(key)
+        if value is None:
+            value = compute()
+            backend.Set(key, value, ttl)
+            with _lock:
+                _stats["misses"] += 1
+        else:
+            with _lock:
+                _stats["hits"] += 1
+    with _lock:
+        _key_locks.pop(key, None)
+    return value
@@ -1,38 +1,67 @@
-import pandas as pd
 import plotly.graph_objects as go
+import modules.Measurements as Measurements
+import modules.Telemetry as Telemetry
 
 
-def ScientificPlot():
-    file_path = 'data/ScientificMeasurements.csv'
-    df = pd.read_csv(file_path, sep=';')
+def Dataset():
+    # The telemetry being ingested when there is a live store, the VA262
+    # flight measurements otherwise
+    view = Telemetry.View()
+    return view.dataset if view is not None else Measurements.Load()
+
+
+def TraceNames(channels=None):
+    dataset = Dataset()
+    th_columns = [col for col in dataset.Names("temperature")
+                  if channels is None or col in channels]
+    photodiode_columns = [col for col in dataset.Names("photodiode")
+                          if channels is None or col in channels]
+    return th_columns, photodiode_columns
+
+
+def TraceData(names, t_range=None):
+    # Decimated (x, y) of each trace, bounded by Measurements.MAX_POINTS
+    # whatever the length of the window
+    t0, t1 = t_range if t_range is not None else (None, None)
+    selected = Dataset().Decimated(names, t0, t1)
+    return [selected[name] for name in names]
+
+
+def ScientificPlot(channels=None, t_range=None):
+    # Only the requested channels over t_range are read from the mapped store
+    th_columns, photodiode_columns = TraceNames(channels)
+    data = TraceData(th_columns + photodiode_columns, t_range)
     fig = go.Figure()
     colors = ['#37474F', '#0077B6', '#7C7F85', '#E63946',
               '#43AA8B', '#6A0572', '#D97941', '#3D5A80', '#FFB703']
 
-    th_columns = [col for col in df.columns if 'TH' in col]
+    # Linear segments: the decimated min/max envelope has no meaningful spline
     for i, col in enumerate(th_columns):
+        x, y = data[i]
         fig.add_trace(go.Scatter(
-            x=df['T'],
-            y=df[col],
+            x=x,
+            y=y,
             mode='lines',
-            line=dict(color=colors[i], shape='spline'),
+            line=dict(color=colors[i % (len(colors) - 1)]),
             name=col,
             hovertemplate='%{y:.1f}°C'
         ))
 
-    fig.add_trace(go.Scatter(
-        x=df['T'],
-        y=df['Photodiode'],
-        mode='lines',
-        name='Photodiode',
-        line=dict(color=colors[-1], shape='spline', dash='dot'),
-        yaxis='y2',
-        hovertemplate='%{y:.1f} mV'
-    ))
+    for col, (x, y) in zip(photodiode_columns, data[len(th_columns):]):
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='lines',
+            name=col,
+            line=dict(color=colors[-1], dash='dot'),
+            yaxis='y2',
+            hovertemplate='%{y:.1f} mV'
+        ))
 
     fig.update_layout(
         title={
-            'text': 'PariSat Scientific Measurements • Ariane 6 Flight VA262 (July 9, 2024)',
+            'text': ('PariSat Live Telemetry' if Telemetry.View() is not None else
+                     'PariSat Scientific Measurements • Ariane 6 Flight VA262 (July 9, 2024)'),
             'x': 0.5,
             'xanchor': 'center',
             'y': 0.9,
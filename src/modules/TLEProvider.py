@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+import requests
+
+SATNOGS_URL = os.environ.get(
+    "PARISAT_SATNOGS_URL", "https://db.satnogs.org/api/tle/")
+TLE_TTL = float(os.environ.get("PARISAT_TLE_TTL", 6 * 3600))
+RETRY_INTERVAL = float(os.environ.get("PARISAT_TLE_RETRY", 60))
+REQUEST_TIMEOUT = float(os.environ.get("PARISAT_TLE_TIMEOUT", 5))
+CACHE_DIR = os.environ.get("PARISAT_TLE_CACHE_DIR", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "tle"))
+
+_entries = {}
+_key_locks = {}
+_refreshing = set()
+_lock = threading.Lock()
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0,
+          "refreshes": 0, "failures": 0, "disk_loads": 0}
+
+
+def _Count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def Stats():
+    with _lock:
+        return dict(_stats)
+
+
+def FetchTLE(norad_cat_id):
+    response = requests.get(SATNOGS_URL, params={"norad_cat_id": norad_cat_id},
+                            timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+    if not data:
+        raise ValueError(f"No TLE published for NORAD {norad_cat_id}")
+    return data[0]
+
+
+def _DiskPath(norad_cat_id):
+    return os.path.join(CACHE_DIR, f"{norad_cat_id}.json")
+
+
+def _ReadDisk(norad_cat_id):
+    try:
+        with open(_DiskPath(norad_cat_id), encoding="utf-8") as f:
+            saved = json.load(f)
+        return saved["tle"], saved["fetched_at"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _WriteDisk(norad_cat_id, tle, fetched_at):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = _DiskPath(norad_cat_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"tle": tle, "fetched_at": fetched_at}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _Store(norad_cat_id, tle, fetched_at):
+    with _lock:
+        _entries[norad_cat_id] = {
+            "tle": tle, "fetched_at": fetched_at, "retry_at": fetched_at + TLE_TTL}
+
+
+def _Refresh(norad_cat_id):
+    try:
+        tle = FetchTLE(norad_cat_id)
+    except (requests.RequestException, ValueError):
+        _Count("failures")
+        with _lock:
+            entry = _entries.get(norad_cat_id)
+            if entry:
+                entry["retry_at"] = time.time() + RETRY_INTERVAL
+            else:
+                # Negative entry, the callers queued on the load and those
+                # arriving before retry_at get None without fetching again
+                _entries[norad_cat_id] = {
+                    "tle": None, "fetched_at": None, "retry_at": time.time() + RETRY_INTERVAL}
+        return None
+    fetched_at = time.time()
+    _Store(norad_cat_id, tle, fetched_at)
+    _WriteDisk(norad_cat_id, tle, fetched_at)
+    _Count("refreshes")
+    return tle
+
+
+def _BackgroundRefresh(norad_cat_id):
+    try:
+        _Refresh(norad_cat_id)
+    finally:
+        with _lock:
+            _refreshing.discard(norad_cat_id)
+
+
+def _ScheduleRefresh(norad_cat_id):
+    with _lock:
+        if norad_cat_id in _refreshing:
+            return
+        _refreshing.add(norad_cat_id)
+    threading.Thread(target=_BackgroundRefresh,
+                     args=(norad_cat_id,), daemon=True).start()
+
+
+def _Load(norad_cat_id):
+    with _lock:
+        key_lock = _key_locks.setdefault(norad_cat_id, threading.Lock())
+    # Concurrent misses on the same satellite wait for a single load
+    with key_lock:
+        with _lock:
+            entry = _entries.get(norad_cat_id)
+        if entry:
+            return entry["tle"]
+        _Count("misses")
+        saved = _ReadDisk(norad_cat_id)
+        if saved:
+            _Count("disk_loads")
+            tle, fetched_at = saved
+            _Store(norad_cat_id, tle, fetched_at)
+            if time.time() - fetched_at >= TLE_TTL:
+                _ScheduleRefresh(norad_cat_id)
+            return tle
+        return _Refresh(norad_cat_id)
+
+
+def GetTLE(norad_cat_id):
+    now = time.time()
+    with _lock:
+        entry = _entries.get(norad_cat_id)
+        if entry:
+            if now < entry["retry_at"]:
+                _stats["hits"] += 1
+                return entry["tle"]
+            _stats["stale_hits"] += 1
+    if entry:
+        _ScheduleRefresh(norad_cat_id)
+        return entry["tle"]
+    return _Load(norad_cat_id)
+
+
+def _AfterFork():
+    # A worker forked from a preloaded master has none of its refresh threads
+    global _lock
+    _lock = threading.Lock()
+    _key_locks.clear()
+    _refreshing.clear()
+
+
+os.register_at_fork(after_in_child=_AfterFork)
+
+
+def Invalidate(norad_cat_id=None):
+    with _lock:
+        if norad_cat_id is None:
+            _entries.clear()
+        else:
+            _entries.pop(norad_cat_id, None)
+
+
+if __name__ == "__main__":
+    print(GetTLE(60239))
+    print(GetTLE(60239))
+    print(Stats())
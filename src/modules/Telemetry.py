@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import numpy as np
+import modules.Measurements as Measurements
+
+STORE_DIR = os.environ.get("PARISAT_TELEMETRY_STORE", os.path.join(Measurements.DATA_DIR, "telemetry"))
+POLL_SECONDS = 0.1
+BATCH_ROWS = 1024
+BATCH_SECONDS = 0.2
+# How long a missing live store is remembered before looking for it again
+STORE_CHECK_SECONDS = 5.0
+RING_ROWS = int(os.environ.get("PARISAT_TELEMETRY_RING", 65536))
+
+_view = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def FileTail(path, poll=POLL_SECONDS):
+    # Lines appended to a file, None while it is idle so that batches can be
+    # flushed without waiting for the next frame
+    while not os.path.exists(path):
+        yield None
+        time.sleep(poll)
+    with open(path, encoding="utf-8") as f:
+        pending = ""
+        while True:
+            chunk = f.readline()
+            if not chunk:
+                yield None
+                time.sleep(poll)
+                continue
+            pending += chunk
+            if pending.endswith("\n"):
+                yield pending.rstrip("\r\n")
+                pending = ""
+
+
+def UDPLines(host, port, poll=POLL_SECONDS):
+    # One or more lines per datagram. Datagrams arriving faster than they are
+    # written wait in, then overflow, the kernel socket buffer
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((host, port))
+        sock.settimeout(poll)
+        while True:
+            try:
+                datagram, _ = sock.recvfrom(65536)
+            except socket.timeout:
+                yield None
+                continue
+            for line in datagram.decode("utf-8", errors="replace").splitlines():
+                yield line
+
+
+def Source(spec):
+    # "file:<path>" or "udp://<host>:<port>"
+    if spec.startswith("udp://"):
+        host, _, port = spec[len("udp://"):].rpartition(":")
+        return UDPLines(host or "0.0.0.0", int(port))
+    return FileTail(spec[len("file:"):] if spec.startswith("file:") else spec)
+
+
+def Frames(lines, n_columns):
+    # Rows of floats, the time first, header and malformed lines are skipped
+    for line in lines:
+        if line is None:
+            yield None
+            continue
+        fields = line.split(";")
+        if len(fields) != n_columns:
+            continue
+        try:
+            yield [float(field) for field in fields]
+        except ValueError:
+            continue
+
+
+def Batches(frames, max_rows=BATCH_ROWS, max_delay=BATCH_SECONDS):
+    # Pulling from the source only between writes is the backpressure: a slow
+    # store slows the reader down instead of buffering frames in memory
+    batch = []
+    started = None
+    for frame in frames:
+        if frame is not None:
+            if not batch:
+                started = time.monotonic()
+            batch.append(frame)
+        if batch and (len(batch) >= max_rows or time.monotonic() - started >= max_delay):
+            yield np.array(batch)
+            batch = []
+
+
+class LiveStore:
+    # Append-only columnar store: one raw file per channel, described by the
+    # same schema as the Measurements store
+    def __init__(self, store_dir, columns):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        channels = []
+        for column in columns[1:]:
+            channel = Measurements.ChannelSchema(column)
+            channel["file"] = f"{channel['key']}.bin"
+            channel["dtype"] = "float32"
+            channels.append(channel)
+        schema = {
+            "version": Measurements.STORE_VERSION,
+            "live": True,
+            "time": {"name": columns[0], "file": f"{columns[0]}.bin", "unit": "s", "dtype": "float64"},
+            "channels": channels,
+        }
+        tmp_path = os.path.join(store_dir, f"schema.json.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(schema, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, os.path.join(store_dir, "schema.json"))
+        self._dtypes = [np.float64] + [np.float32] * len(channels)
+        paths = [os.path.join(store_dir, column["file"]) for column in [schema["time"]] + channels]
+        # Drop the partial row an interrupted append may have left
+        rows = min(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+                   for path, dtype in zip(paths, self._dtypes))
+        self._files = []
+        for path, dtype in zip(paths, self._dtypes):
+            f = open(path, "ab")
+            f.truncate(rows * np.dtype(dtype).itemsize)
+            self._files.append(f)
+
+    def Append(self, rows):
+        # Readers count the rows of the shortest file, so the time axis is
+        # written last
+        for column in list(range(1, len(self._files))) + [0]:
+            self._files[column].write(rows[:, column].astype(self._dtypes[column]).tobytes())
+            self._files[column].flush()
+
+    def Close(self):
+        for f in self._files:
+            f.close()
+
+
+def Ingest(spec, store_dir=STORE_DIR, columns=None):
+    if columns is None:
+        with open(Measurements.CSV_PATH, encoding="utf-8") as f:
+            columns = f.readline().strip().split(";")
+    store = LiveStore(store_dir, columns)
+    try:
+        for rows in Batches(Frames(Source(spec), len(columns))):
+            store.Append(rows)
+    finally:
+        store.Close()
+
+
+class RingBuffer:
+    def __init__(self, capacity, dtype):
+        self.values = np.empty(capacity, dtype=dtype)
+        self.total = 0
+
+    def Extend(self, values):
+        values = values[-len(self.values):]
+        start = self.total % len(self.values)
+        head = min(len(values), len(self.values) - start)
+        self.values[start:start + head] = values[:head]
+        self.values[:len(values) - head] = values[head:]
+        self.total += len(values)
+
+    def Since(self, total):
+        # Values appended after the first `total` ones, as far as they are kept
+        total = max(total, self.total - len(self.values))
+        indices = np.arange(total, self.total) % len(self.values)
+        return self.values[indices]
+
+
+class LiveView:
+    # Latest rows of the live store, read once per poll for every session of
+    # the worker and kept in bounded ring buffers. Cursors are row counts of
+    # the store, so a browser can poll any worker with the same cursor
+    def __init__(self, dataset, capacity=RING_ROWS):
+        self.dataset = dataset
+        self.names = dataset.Names()
+        self.rows = 0
+        # Store rows before the first one appended to the rings
+        self.offset = 0
+        self.time = RingBuffer(capacity, np.float64)
+        self.channels = {name: RingBuffer(capacity, np.float32) for name in self.names}
+        self._lock = threading.Lock()
+
+    def _Poll(self):
+        rows = self.dataset.Count()
+        if rows > self.rows:
+            # Only the last ring of rows matters after a long pause
+            start = max(self.rows, rows - len(self.time.values))
+            self.offset += start - self.rows
+            times, values = self.dataset.Slice(start, rows)
+            self.time.Extend(np.asarray(times))
+            for name in self.names:
+                self.channels[name].Extend(np.asarray(values[name]))
+            self.rows = rows
+
+    def Cursor(self):
+        with self._lock:
+            self._Poll()
+            return self.rows
+
+    def Since(self, cursor):
+        # New rows after cursor and the cursor to poll with next, a new
+        # client starts from the current end
+        with self._lock:
+            self._Poll()
+            cursor = self.rows if cursor is None else min(cursor, self.rows)
+            total = cursor - self.offset
+            return (self.time.Since(total),
+                    {name: buffer.Since(total) for name, buffer in self.channels.items()},
+                    self.rows)
+
+
+def View():
+    # None unless a live store exists, a missing store is only looked for
+    # again every STORE_CHECK_SECONDS
+    global _view, _checked_at
+    if _view is None and time.time() - _checked_at >= STORE_CHECK_SECONDS:
+        with _lock:
+            if _view is None and time.time() - _checked_at >= STORE_CHECK_SECONDS:
+                dataset = Measurements.Read(STORE_DIR)
+                if dataset is not None:
+                    _view = LiveView(dataset)
+                _checked_at = time.time()
+    return _view
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Append decoded PariSat telemetry frames to the live store")
+    parser.add_argument("command", choices=["ingest"])
+    parser.add_argument("source", help="file:<path> to follow or udp://<host>:<port> to listen on")
+    parser.add_argument("--output", default=STORE_DIR)
+    args = parser.parse_args()
+    Ingest(args.source, args.output)